@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import platform
+import smtplib
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.email_delivery import DELIVERED, EmailDeliveryChannel, SMTPConnectionPool
+from benchmarks.scoring_benchmark import RESULTS_DIR, git_revision
+from benchmarks.smtp_sink import SMTPSink
+
+DEFAULT_POOL_SIZES = [1, 4, 8]
+
+
+def synthetic_steps(count, domains):
+    return [
+        {
+            'id': i,
+            'step_type': 'email',
+            'content': json.dumps({
+                'subject': f"Partnership opportunity #{i}",
+                'body': "Dear team,\n\nSecond Life NGO maps beach pollution with AI-powered drones. " * 5
+            }),
+            'prospect': {
+                'organization_name': f"Organization {i}",
+                'emails': [f"contact{i}@org{i % domains}.example"]
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def bench_connection_per_message(sink, steps):
+    # Reference: one SMTP session per message, as a naive sender would do
+    channel = EmailDeliveryChannel(pool=SMTPConnectionPool(sink.host, sink.port, '', '', use_tls=False, size=1),
+                                   domain_rate=0, max_retries=0)
+    messages = [channel.build_message(step) for step in steps]
+    delivered = 0
+    start = time.perf_counter()
+    for message in messages:
+        with smtplib.SMTP(sink.host, sink.port) as conn:
+            try:
+                conn.send_message(message)
+                delivered += 1
+            except smtplib.SMTPException:
+                pass
+    elapsed = time.perf_counter() - start
+    channel.close()
+    return {
+        'mode': 'connection_per_message',
+        'messages': len(messages),
+        'delivered': delivered,
+        'seconds': elapsed,
+        'messages_per_second': delivered / elapsed if elapsed else None
+    }
+
+
+def bench_pooled(sink, steps, pool_size, batch_size, domain_rate):
+    pool = SMTPConnectionPool(sink.host, sink.port, '', '', use_tls=False, size=pool_size)
+    channel = EmailDeliveryChannel(pool=pool, batch_size=batch_size, domain_rate=domain_rate, retry_delay=0.05)
+    start = time.perf_counter()
+    results = channel.deliver(steps)
+    elapsed = time.perf_counter() - start
+    channel.close()
+    delivered = sum(1 for result in results.values() if result['status'] == DELIVERED)
+    return {
+        'mode': 'pooled',
+        'pool_size': pool_size,
+        'batch_size': batch_size,
+        'messages': len(steps),
+        'delivered': delivered,
+        'connections_opened': pool.stats['opened'],
+        'seconds': elapsed,
+        'messages_per_second': delivered / elapsed if elapsed else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit d'envoi des emails d'outreach contre un serveur SMTP local")
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--domains', type=int, default=50)
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=DEFAULT_POOL_SIZES)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--domain-rate', type=float, default=0, help='Messages par seconde et par domaine (0: illimité)')
+    parser.add_argument('--latency-ms', type=float, default=2, help='Latence simulée du serveur par message')
+    parser.add_argument('--defer-rate', type=float, default=0, help='Proportion de refus temporaires (451)')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    steps = synthetic_steps(args.messages, args.domains)
+    sink = SMTPSink(latency_ms=args.latency_ms, defer_rate=args.defer_rate).start()
+
+    results = {
+        'benchmark': 'email_delivery',
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server_latency_ms': args.latency_ms,
+        'defer_rate': args.defer_rate,
+        'runs': []
+    }
+
+    try:
+        run = bench_connection_per_message(sink, steps)
+        results['runs'].append(run)
+        print(f"connection per message: {run['messages_per_second']:.0f} msg/s, "
+              f"{run['delivered']}/{run['messages']} delivered")
+
+        for pool_size in args.pool_sizes:
+            run = bench_pooled(sink, steps, pool_size, args.batch_size, args.domain_rate)
+            results['runs'].append(run)
+            print(f"pool of {pool_size}: {run['messages_per_second']:.0f} msg/s, "
+                  f"{run['delivered']}/{run['messages']} delivered over {run['connections_opened']} connections")
+    finally:
+        sink.stop()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"email_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.ai_scoring_engine import AIProspectScoringEngine
+from src.intelligent_donor_crawler import IntelligentDonorCrawler
+from benchmarks.synthetic_prospects import SyntheticProspectGenerator, deterministic_llm_insights
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def percentile(values, pct):
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def build_engine(db_path):
+    engine = AIProspectScoringEngine('benchmark-key', db_path)
+    engine.generate_llm_insights = deterministic_llm_insights
+    return engine
+
+
+def populate_database(db_path, prospects):
+    IntelligentDonorCrawler('benchmark-key', db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''
+        INSERT OR REPLACE INTO prospects
+        (url, organization_name, emails, phones, addresses, content_text,
+         sustainability_score, donation_probability, engagement_score, final_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (
+            p['url'], p['organization_name'], json.dumps(p['emails']), json.dumps(p['phones']),
+            json.dumps(p['addresses']), p['content_text'], p['sustainability_score'],
+            p['donation_probability'], p['engagement_score'], p['final_score']
+        )
+        for p in prospects
+    ])
+    conn.commit()
+    conn.close()
+
+
+def bench_size(size, seed, latency_samples, workdir):
+    generator = SyntheticProspectGenerator(seed=seed)
+    prospects = generator.generate(size)
+    db_path = os.path.join(workdir, f'bench_{size}.db')
+    engine = build_engine(db_path)
+
+    start = time.perf_counter()
+    X, feature_names = engine.prepare_features(prospects)
+    featurization_s = time.perf_counter() - start
+
+    y = np.array([p['label'] for p in prospects])
+    start = time.perf_counter()
+    engine.fit_models(X, y, feature_names)
+    training_s = time.perf_counter() - start
+
+    samples = SyntheticProspectGenerator(seed=seed + 1).generate(latency_samples)
+    latencies_ms = []
+    for prospect in samples:
+        start = time.perf_counter()
+        engine.score_prospect(prospect)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    populate_database(db_path, prospects)
+    start = time.perf_counter()
+    scored = engine.batch_score_prospects()
+    batch_s = time.perf_counter() - start
+
+    return {
+        'rows': size,
+        'feature_count': len(feature_names),
+        'avg_text_words': statistics.mean(len(p['content_text'].split()) for p in prospects),
+        'featurization': {
+            'seconds': featurization_s,
+            'rows_per_second': size / featurization_s if featurization_s else None
+        },
+        'training': {
+            'seconds': training_s,
+            'rows_per_second': size / training_s if training_s else None
+        },
+        'single_prospect_latency_ms': {
+            'samples': len(latencies_ms),
+            'mean': statistics.mean(latencies_ms),
+            'p50': percentile(latencies_ms, 50),
+            'p95': percentile(latencies_ms, 95),
+            'p99': percentile(latencies_ms, 99)
+        },
+        'batch_scoring': {
+            'rows': len(scored),
+            'seconds': batch_s,
+            'rows_per_second': len(scored) / batch_s if batch_s else None
+        }
+    }
+
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    previous = {run['rows']: run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in results['runs']:
+        before = previous.get(run['rows'])
+        if not before:
+            continue
+        checks = [
+            ('featurization.seconds', run['featurization']['seconds'], before['featurization']['seconds']),
+            ('training.seconds', run['training']['seconds'], before['training']['seconds']),
+            ('single_prospect_latency_ms.p95', run['single_prospect_latency_ms']['p95'], before['single_prospect_latency_ms']['p95']),
+            ('batch_scoring.seconds', run['batch_scoring']['seconds'], before['batch_scoring']['seconds'])
+        ]
+        for metric, current, reference in checks:
+            if reference and current > reference * (1 + tolerance):
+                regressions.append({
+                    'rows': run['rows'],
+                    'metric': metric,
+                    'baseline': reference,
+                    'current': current,
+                    'change': current / reference - 1
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du moteur de scoring AIProspectScoringEngine')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-samples', type=int, default=200)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None, help='Fichier JSON de référence pour détecter les régressions')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'ai_scoring_engine',
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'runs': []
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"Benchmarking {size} prospects...")
+            run = bench_size(size, args.seed, args.latency_samples, workdir)
+            results['runs'].append(run)
+            print(f"  featurization: {run['featurization']['seconds']:.2f}s, "
+                  f"training: {run['training']['seconds']:.2f}s, "
+                  f"p95 latency: {run['single_prospect_latency_ms']['p95']:.1f}ms, "
+                  f"batch: {run['batch_scoring']['rows_per_second']:.0f} rows/s")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"scoring_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    if args.baseline:
+        results['regressions'] = compare_with_baseline(results, args.baseline, args.tolerance)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if results.get('regressions'):
+        for regression in results['regressions']:
+            print(f"REGRESSION {regression['rows']} rows {regression['metric']}: "
+                  f"{regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['change']:+.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
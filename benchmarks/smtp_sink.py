@@ -0,0 +1,129 @@
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """
+    Session SMTP minimale : accepte tous les messages et les compte sans les délivrer
+    """
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 smtp-sink ready")
+        recipients = 0
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-smtp-sink\r\n250-PIPELINING\r\n250 8BITMIME\r\n")
+            elif command.startswith("HELO"):
+                self.reply("250 smtp-sink")
+            elif command.startswith("MAIL FROM"):
+                recipients = 0
+                self.reply("250 OK")
+            elif command.startswith("RCPT TO"):
+                if sink.should_defer():
+                    self.reply("451 Try again later")
+                else:
+                    recipients += 1
+                    self.reply("250 OK")
+            elif command == "DATA":
+                if not recipients:
+                    self.reply("503 No valid recipients")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                if sink.latency_ms:
+                    time.sleep(sink.latency_ms / 1000)
+                with sink.lock:
+                    sink.messages += 1
+                self.reply("250 OK queued")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class ThreadedSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    Serveur SMTP local de test : compte connexions et messages, avec latence par message
+    et refus temporaires (451) simulés
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, defer_rate=0.0):
+        """
+        Args:
+            host: Adresse d'écoute
+            port: Port d'écoute (0: port libre choisi par le système)
+            latency_ms: Délai simulé avant l'acceptation de chaque message
+            defer_rate: Proportion de destinataires refusés temporairement (451)
+        """
+        self.latency_ms = latency_ms
+        self.defer_rate = defer_rate
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self._rcpt_count = 0
+        self.server = ThreadedSMTPServer((host, port), SMTPSinkHandler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address
+        self._thread = None
+
+    def should_defer(self):
+        if not self.defer_rate:
+            return False
+        # Refus déterministes : un destinataire sur 1/defer_rate
+        with self.lock:
+            self._rcpt_count += 1
+            return self._rcpt_count % max(1, round(1 / self.defer_rate)) == 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serveur SMTP local qui accepte et compte les messages')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1025)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--defer-rate', type=float, default=0)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.latency_ms, args.defer_rate).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port} (SMTP_SERVER={sink.host} SMTP_PORT={sink.port} SMTP_USE_TLS=0)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"connections: {sink.connections}, messages: {sink.messages}")
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+from typing import List, Dict, Any, Optional, Union
+
+import httpx
+
+from src.ai_client import PROVIDER_SETTINGS, resolve_model, resolve_provider_settings, normalize_completion
+
+
+class AsyncAIClient:
+    """
+    Client asynchrone (httpx) pour les APIs OpenAI et DeepSeek, avec plafond de concurrence
+    """
+
+    def __init__(self, provider=None, api_key=None, api_base=None,
+                 max_concurrency: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None):
+        """
+        Initialise le client AI asynchrone
+
+        Args:
+            provider: Fournisseur d'API ('openai' ou 'deepseek')
+            api_key: Clé API
+            api_base: URL de base de l'API
+            max_concurrency: Nombre maximum de requêtes simultanées (AI_MAX_CONCURRENCY)
+            connect_timeout: Timeout de connexion en secondes (AI_CONNECT_TIMEOUT)
+            read_timeout: Timeout de lecture en secondes (AI_READ_TIMEOUT)
+        """
+        self.provider = provider or os.getenv("AI_PROVIDER", "openai").lower()
+
+        if self.provider not in PROVIDER_SETTINGS:
+            raise ValueError("Provider must be 'openai' or 'deepseek'")
+
+        self.api_key, self.api_base = resolve_provider_settings(self.provider, api_key, api_base)
+        self.default_model = PROVIDER_SETTINGS[self.provider]["default_model"]
+        self.max_concurrency = int(max_concurrency or os.getenv("AI_MAX_CONCURRENCY", 32))
+
+        timeout = httpx.Timeout(
+            float(read_timeout or os.getenv("AI_READ_TIMEOUT", 60)),
+            connect=float(connect_timeout or os.getenv("AI_CONNECT_TIMEOUT", 5))
+        )
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            ),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}"
+            }
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.chat = AsyncChat(self)
+
+    async def create_completion(self,
+                                model: Optional[str] = None,
+                                messages: List[Dict[str, str]] = None,
+                                temperature: float = 0.7,
+                                max_tokens: int = 1000,
+                                top_p: float = 1.0,
+                                frequency_penalty: float = 0.0,
+                                presence_penalty: float = 0.0,
+                                stop: Optional[Union[str, List[str]]] = None) -> Dict[str, Any]:
+        """
+        Crée une complétion de chat (même format de réponse que les clients synchrones)
+        """
+        model = resolve_model(self.provider, model) or self.default_model
+        if not messages:
+            messages = [{"role": "user", "content": "Hello"}]
+
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": top_p,
+            "frequency_penalty": frequency_penalty,
+            "presence_penalty": presence_penalty
+        }
+
+        if stop:
+            data["stop"] = stop
+
+        response = None
+        async with self._semaphore:
+            try:
+                response = await self._http.post(f"{self.api_base}/chat/completions", json=data)
+                response.raise_for_status()
+                return normalize_completion(response.json(), model)
+
+            except httpx.HTTPError as e:
+                error_msg = str(e)
+                try:
+                    if response is not None and response.text:
+                        error_data = response.json()
+                        if "error" in error_data:
+                            error_msg = error_data["error"].get("message", str(e))
+                except Exception:
+                    pass
+
+                return {
+                    "error": {
+                        "message": error_msg,
+                        "type": "api_error",
+                        "code": response.status_code if response is not None else 500
+                    }
+                }
+
+    async def gather(self, requests: List[Dict[str, Any]], return_exceptions: bool = False) -> List[Any]:
+        """
+        Exécute un lot de complétions en parallèle (dans la limite de max_concurrency)
+
+        Args:
+            requests: Liste de paramètres pour create_completion (model, messages, ...)
+            return_exceptions: Renvoie les exceptions à leur position au lieu de les propager
+
+        Returns:
+            Les réponses, dans l'ordre des requêtes
+        """
+        return await asyncio.gather(
+            *(self.create_completion(**params) for params in requests),
+            return_exceptions=return_exceptions
+        )
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+class AsyncChat:
+    """
+    Espace de noms chat.completions, comme le client OpenAI
+    """
+
+    def __init__(self, client: AsyncAIClient):
+        self.completions = AsyncCompletions(client)
+
+
+class AsyncCompletions:
+
+    def __init__(self, client: AsyncAIClient):
+        self._client = client
+
+    async def create(self, **kwargs) -> Dict[str, Any]:
+        return await self._client.create_completion(**kwargs)
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional
+
+from src.ai_client import AIClient
+from src.ai_mock import MOCK_PROVIDER
+
+DEFAULT_WORK_DIR = os.path.join(os.path.dirname(__file__), 'database', 'batches')
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Statuts normalisés d'un lot
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def batch_request_line(custom_id: str, body: Dict[str, Any]) -> str:
+    """
+    Une ligne du fichier JSONL d'entrée (format Batch API OpenAI)
+    """
+    return json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                      ensure_ascii=False)
+
+
+def result_content(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Texte de la complétion d'une ligne de résultat, ou None si la requête a échoué
+    """
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code", 200) != 200:
+        return None
+    choices = (response.get("body") or {}).get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("message") or {}).get("content")
+
+
+class LocalBatchBackend:
+    """
+    Lots traités localement à partir de fichiers (mêmes formats d'entrée et de sortie que la
+    Batch API OpenAI) : chaque requête passe par le client AI configuré, appel par appel
+    """
+
+    name = "local"
+
+    def __init__(self, work_dir=None, client=None):
+        """
+        Args:
+            work_dir: Répertoire des lots (AI_BATCH_DIR)
+            client: Client AI (AIClient ou RoutingAIClient) qui traite les requêtes. Sans client,
+                seul le fournisseur 'mock' est utilisé, et uniquement si AI_PROVIDER=mock
+
+        Raises:
+            ValueError: sans client, si AI_PROVIDER n'est pas 'mock' (pas de contenu factice en production)
+        """
+        self.work_dir = work_dir or os.getenv("AI_BATCH_DIR", DEFAULT_WORK_DIR)
+        if client is None:
+            if os.getenv("AI_PROVIDER", "openai").lower() != MOCK_PROVIDER:
+                raise ValueError("The local batch backend needs an AI client unless AI_PROVIDER=mock")
+            client = AIClient(provider=MOCK_PROVIDER)
+        self.client = client
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def _meta_path(self, batch_id):
+        return os.path.join(self.work_dir, f"{batch_id}.json")
+
+    def _write_meta(self, batch_id, meta):
+        tmp_path = self._meta_path(batch_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(batch_id))
+
+    def submit(self, input_path: str) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:16]}"
+        self._write_meta(batch_id, {"status": IN_PROGRESS, "input_file": input_path, "created_at": time.time()})
+        threading.Thread(target=self._process, args=(batch_id, input_path), name=batch_id, daemon=True).start()
+        return batch_id
+
+    def _process(self, batch_id, input_path):
+        output_path = os.path.join(self.work_dir, f"{batch_id}_output.jsonl")
+        counts = {"completed": 0, "failed": 0}
+        try:
+            with open(input_path, "r", encoding="utf-8") as source, open(output_path, "w", encoding="utf-8") as out:
+                for line in source:
+                    if not line.strip():
+                        continue
+                    request = json.loads(line)
+                    try:
+                        body = self.client.create_completion(**request["body"], cache=False, call_site="local_batch")
+                    except Exception as e:
+                        result = {"custom_id": request["custom_id"], "response": None,
+                                  "error": {"message": str(e), "type": type(e).__name__}}
+                        counts["failed"] += 1
+                    else:
+                        result = {"custom_id": request["custom_id"],
+                                  "response": {"status_code": 200, "body": dict(body)}, "error": None}
+                        counts["completed"] += 1
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            meta = {"status": COMPLETED, "output_file": output_path, "request_counts": counts}
+        except Exception as e:
+            meta = {"status": FAILED, "error": str(e), "request_counts": counts}
+        meta.update({"input_file": input_path, "completed_at": time.time()})
+        self._write_meta(batch_id, meta)
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._meta_path(batch_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        with open(self.status(batch_id)["output_file"], "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class OpenAIBatchBackend:
+    """
+    Batch API OpenAI : dépôt du fichier JSONL, création du lot (fenêtre 24h) et lecture des résultats
+    """
+
+    name = "openai"
+
+    _STATUSES = {
+        "validating": IN_PROGRESS,
+        "in_progress": IN_PROGRESS,
+        "finalizing": IN_PROGRESS,
+        "completed": COMPLETED,
+        "failed": FAILED,
+        "expired": FAILED,
+        "cancelling": FAILED,
+        "cancelled": FAILED
+    }
+
+    def __init__(self, api_key=None, api_base=None):
+        import openai
+        self.client = openai.OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=api_base or os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+        )
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": self._STATUSES.get(batch.status, IN_PROGRESS),
+            "provider_status": batch.status,
+            "request_counts": {"completed": counts.completed, "failed": counts.failed} if counts else {},
+            "error": str(batch.errors) if batch.errors else None
+        }
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+def get_batch_backend(name: Optional[str] = None, client=None):
+    """
+    Adaptateur de lots selon AI_BATCH_BACKEND : 'local' (par défaut, via client) ou 'openai'
+    """
+    name = (name or os.getenv("AI_BATCH_BACKEND", "local")).lower()
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        return LocalBatchBackend(client=client)
+    raise ValueError("AI_BATCH_BACKEND must be 'local' or 'openai'")
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'ai_cache.db')
+
+CACHE_KEY_FIELDS = ("model", "messages", "temperature", "max_tokens")
+
+
+def completion_cache_key(provider: str, params: Dict[str, Any]) -> str:
+    """
+    Hash déterministe d'une requête : (provider, model, messages, temperature, max_tokens)
+    plus les éventuels autres paramètres de génération
+    """
+    payload = {"provider": provider}
+    for field in CACHE_KEY_FIELDS:
+        payload[field] = params.get(field)
+    payload["extra"] = {k: v for k, v in params.items() if k not in CACHE_KEY_FIELDS}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Cache de réponses à deux niveaux : LRU en mémoire au-dessus d'un stockage SQLite persistant
+    """
+
+    def __init__(self, db_path=None, max_memory_entries=None, max_disk_entries=None, ttl=None):
+        """
+        Args:
+            db_path: Fichier SQLite du niveau persistant, None pour la mémoire seule (AI_CACHE_DB)
+            max_memory_entries: Taille du LRU en mémoire (AI_CACHE_MEMORY_ENTRIES)
+            max_disk_entries: Nombre maximum d'entrées persistées (AI_CACHE_DISK_ENTRIES)
+            ttl: Durée de vie d'une entrée en secondes (AI_CACHE_TTL)
+        """
+        self.db_path = db_path
+        self.max_memory_entries = int(max_memory_entries or os.getenv("AI_CACHE_MEMORY_ENTRIES", 1000))
+        self.max_disk_entries = int(max_disk_entries or os.getenv("AI_CACHE_DISK_ENTRIES", 50000))
+        self.ttl = float(ttl or os.getenv("AI_CACHE_TTL", 7 * 24 * 3600))
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._local = threading.local()
+        self._writes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._connection().execute('''
+                CREATE TABLE IF NOT EXISTS completion_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT,
+                    created_at REAL,
+                    expires_at REAL,
+                    last_access REAL
+                )
+            ''')
+            self._connection().execute(
+                'CREATE INDEX IF NOT EXISTS idx_completion_cache_last_access ON completion_cache (last_access)'
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        if self.db_path:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT response, expires_at FROM completion_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                conn.execute('UPDATE completion_cache SET last_access = ? WHERE key = ?', (now, key))
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                self._count("disk_hits")
+                return value
+            if row:
+                conn.execute('DELETE FROM completion_cache WHERE key = ?', (key,))
+
+        self._count("misses")
+        return None
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        self._remember(key, expires_at, value)
+        self._count("writes")
+
+        if self.db_path:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO completion_cache VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(value), now, expires_at, now)
+            )
+            with self._lock:
+                self._writes += 1
+                should_evict = self._writes % 100 == 0
+            if should_evict:
+                self.evict()
+
+    def evict(self):
+        """
+        Supprime les entrées expirées puis les moins récemment utilisées au-delà de la taille maximum
+        """
+        if not self.db_path:
+            return 0
+        conn = self._connection()
+        removed = conn.execute('DELETE FROM completion_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+        overflow = conn.execute('SELECT COUNT(*) FROM completion_cache').fetchone()[0] - self.max_disk_entries
+        if overflow > 0:
+            removed += conn.execute('''
+                DELETE FROM completion_cache WHERE key IN (
+                    SELECT key FROM completion_cache ORDER BY last_access LIMIT ?
+                )
+            ''', (overflow,)).rowcount
+        self._count("evictions", removed)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            self._connection().execute('DELETE FROM completion_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        if self.db_path:
+            stats["disk_entries"] = self._connection().execute('SELECT COUNT(*) FROM completion_cache').fetchone()[0]
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """
+    Cache partagé du processus, ou None si AI_CACHE_ENABLED n'est pas activé
+    """
+    global _default_cache
+    if os.getenv("AI_CACHE_ENABLED", "0").lower() not in ["1", "true", "yes"]:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = CompletionCache(db_path=os.getenv("AI_CACHE_DB", DEFAULT_DB_PATH))
+    return _default_cache
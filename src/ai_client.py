@@ -1,73 +1,457 @@
 import os
+import time
 import requests
 import json
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Union
+
+from src.ai_resilience import (
+    AIProviderError, CircuitBreaker, RetryPolicy, call_with_retry, get_circuit_breaker, parse_retry_after
+)
+from src.ai_cache import CompletionCache, completion_cache_key, get_completion_cache
+from src.ai_singleflight import SingleFlight, get_single_flight
+from src.ai_rate_limiter import RateLimiter, estimate_tokens, get_rate_limiter
+from src.ai_mock import MOCK_PROVIDER, RecordingBackend, create_mock_backend
+from src.ai_telemetry import TelemetryRecorder, get_telemetry_recorder, infer_call_site
+from src.ai_transport import HTTPTransport, get_default_transport
+
+PROVIDER_SETTINGS = {
+    "openai": {
+        "label": "OpenAI",
+        "api_key_env": "OPENAI_API_KEY",
+        "api_base_env": "OPENAI_API_BASE",
+        "default_api_base": "https://api.openai.com/v1",
+        "default_model": "gpt-3.5-turbo"
+    },
+    "deepseek": {
+        "label": "DeepSeek",
+        "api_key_env": "DEEPSEEK_API_KEY",
+        "api_base_env": "DEEPSEEK_API_BASE",
+        "default_api_base": "https://api.deepseek.com/v1",
+        "default_model": "deepseek-chat"
+    }
+}
+
+
+def resolve_provider_settings(provider, api_key=None, api_base=None):
+    """
+    Résout la clé API et l'URL de base d'un fournisseur (arguments puis variables d'environnement)
+    
+    Returns:
+        Tuple (api_key, api_base)
+    """
+    settings = PROVIDER_SETTINGS[provider]
+    api_key = api_key or os.getenv(settings["api_key_env"])
+    api_base = api_base or os.getenv(settings["api_base_env"], settings["default_api_base"])
+    
+    if not api_key:
+        raise ValueError(f"{settings['label']} API key is required. Set it as {settings['api_key_env']} environment variable or pass it to the constructor.")
+    
+    return api_key, api_base
+
+
+def provider_api_key(api_key, provider=None):
+    """
+    Clé à transmettre au client : les moteurs reçoivent la clé OpenAI (OPENAI_API_KEY), qui ne vaut
+    que pour OpenAI ; les autres fournisseurs lisent leur propre variable (DEEPSEEK_API_KEY)
+    """
+    provider = (provider or os.getenv("AI_PROVIDER", "openai")).lower()
+    return api_key if provider == "openai" else None
+
+
+def resolve_model(provider, model):
+    """
+    Modèle envoyé au fournisseur : les noms de modèles OpenAI demandés par les moteurs (gpt-4,
+    gpt-3.5-turbo) sont remplacés par le modèle par défaut des autres fournisseurs
+    """
+    settings = PROVIDER_SETTINGS.get(provider)
+    if settings is None or provider == "openai" or not model or not str(model).startswith("gpt-"):
+        return model
+    return settings["default_model"]
+
+
+def normalize_completion(result: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """
+    Adapte une réponse au format OpenAI (DeepSeek peut renvoyer un champ 'response')
+    """
+    if "choices" not in result and "response" in result:
+        return {
+            "id": result.get("id", "deepseek-response"),
+            "object": "chat.completion",
+            "created": result.get("created", 0),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": result.get("response", "")
+                    },
+                    "finish_reason": "stop"
+                }
+            ],
+            "usage": result.get("usage", {})
+        }
+    
+    return result
+
+
+def iter_sse_chunks(response) -> Iterator[Dict[str, Any]]:
+    """
+    Lit un flux Server-Sent Events de complétion ("data: {...}" jusqu'à "data: [DONE]")
+    """
+    try:
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                break
+            yield json.loads(payload)
+    finally:
+        response.close()
+
+
+class CompletionResponse(dict):
+    """
+    Réponse normalisée : dictionnaire JSON-sérialisable, accessible aussi par attribut
+    (response.choices[0].message.content), quel que soit le fournisseur
+    """
+    
+    def __getattr__(self, name):
+        try:
+            return _wrap_response_value(self[name])
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _wrap_response_value(value):
+    if isinstance(value, dict) and not isinstance(value, CompletionResponse):
+        return CompletionResponse(value)
+    if isinstance(value, list):
+        return [_wrap_response_value(item) for item in value]
+    return value
+
+
+class CompletionStream:
+    """
+    Flux de complétion normalisé : itère sur des chunks au format OpenAI
+    (chunk.choices[0].delta.content), quel que soit le fournisseur
+    """
+    
+    def __init__(self, chunks: Iterator[Dict[str, Any]]):
+        self._chunks = chunks
+    
+    def __iter__(self) -> Iterator[CompletionResponse]:
+        for chunk in self._chunks:
+            yield chunk if isinstance(chunk, CompletionResponse) else CompletionResponse(chunk)
+    
+    def text_deltas(self) -> Iterator[str]:
+        """Fragments de texte successifs"""
+        for chunk in self:
+            for choice in chunk.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
+    
+    def collect(self) -> str:
+        """Texte complet, une fois le flux terminé"""
+        return "".join(self.text_deltas())
+
 
 class AIClient:
     """
-    Client unifié pour les APIs OpenAI et DeepSeek
+    Client unifié pour les APIs OpenAI et DeepSeek (et le fournisseur local 'mock')
     """
     
-    def __init__(self, provider=None, api_key=None, api_base=None):
+    def __init__(self, provider=None, api_key=None, api_base=None, transport: Optional[HTTPTransport] = None,
+                 retry_policy: Optional[RetryPolicy] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None, cache: Union[CompletionCache, bool, None] = None,
+                 single_flight: Union[SingleFlight, bool, None] = None,
+                 telemetry: Union[TelemetryRecorder, bool, None] = None):
         """
         Initialise le client AI
         
         Args:
-            provider: Fournisseur d'API ('openai' ou 'deepseek')
+            provider: Fournisseur d'API ('openai', 'deepseek' ou 'mock')
             api_key: Clé API
             api_base: URL de base de l'API
+            transport: Transport HTTP poolé (par défaut: transport partagé du processus)
+            retry_policy: Politique de retry (par défaut: configurée par variables d'environnement)
+            circuit_breaker: Circuit breaker (par défaut: celui partagé du fournisseur)
+            rate_limiter: Limiteur RPM/TPM (par défaut: celui partagé du fournisseur)
+            cache: Cache de réponses (par défaut: cache partagé si AI_CACHE_ENABLED, False pour désactiver)
+            single_flight: Coalescence des requêtes identiques simultanées (par défaut: groupe partagé
+                du processus si AI_COALESCE_ENABLED, False pour désactiver)
+            telemetry: Enregistreur des métriques par appel (par défaut: celui du processus
+                si AI_TELEMETRY_ENABLED, False pour désactiver)
         """
         # Déterminer le fournisseur
         self.provider = provider or os.getenv("AI_PROVIDER", "openai").lower()
+        self.transport = transport or get_default_transport()
+        
+        if self.provider not in PROVIDER_SETTINGS and self.provider != MOCK_PROVIDER:
+            raise ValueError("Provider must be 'openai', 'deepseek' or 'mock'")
         
-        if self.provider not in ["openai", "deepseek"]:
-            raise ValueError("Provider must be 'openai' or 'deepseek'")
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(self.provider)
+        self.rate_limiter = rate_limiter or get_rate_limiter(self.provider)
+        self.cache = get_completion_cache() if cache is None else (cache or None)
+        if single_flight is None:
+            coalesce = os.getenv("AI_COALESCE_ENABLED", "1").lower() in ["1", "true", "yes"]
+            single_flight = get_single_flight() if coalesce else None
+        self.single_flight = single_flight or None
+        self.telemetry = get_telemetry_recorder() if telemetry is None else (telemetry or None)
         
         # Initialiser le client approprié
         if self.provider == "openai":
             self._init_openai(api_key, api_base)
+        elif self.provider == MOCK_PROVIDER:
+            self._init_mock()
         else:
             self._init_deepseek(api_key, api_base)
+        
+        # Enregistrement des réponses réelles pour les rejouer hors ligne (AI_MOCK_MODE=replay)
+        record_file = os.getenv("AI_RECORD_FILE")
+        if record_file and self.provider != MOCK_PROVIDER:
+            self.backend = RecordingBackend(self.backend, record_file)
+        
+        self.chat = ChatNamespace(self)
     
     def _init_openai(self, api_key=None, api_base=None):
         """Initialise le client OpenAI"""
+        self.api_key, self.api_base = resolve_provider_settings("openai", api_key, api_base)
+        
         try:
             import openai
-            self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-            self.api_base = api_base or os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
-            
-            if not self.api_key:
-                raise ValueError("OpenAI API key is required. Set it as OPENAI_API_KEY environment variable or pass it to the constructor.")
-            
-            self.client = openai.OpenAI(api_key=self.api_key, base_url=self.api_base)
-            self.chat = self.client.chat
+            # Les retries sont gérés par AIClient (backoff + circuit breaker)
+            self.client = openai.OpenAI(
+                api_key=self.api_key,
+                base_url=self.api_base,
+                timeout=self._native_timeout(),
+                max_retries=0
+            )
+            self.backend = self.client.chat.completions
             self._is_native = True
             
         except ImportError:
             print("OpenAI package not found. Using custom implementation.")
-            self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-            self.api_base = api_base or os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
-            
-            if not self.api_key:
-                raise ValueError("OpenAI API key is required. Set it as OPENAI_API_KEY environment variable or pass it to the constructor.")
-            
-            self.chat = OpenAICompatClient(self.api_key, self.api_base)
+            self.backend = OpenAICompatClient(self.api_key, self.api_base, self.transport)
             self._is_native = False
     
     def _init_deepseek(self, api_key=None, api_base=None):
         """Initialise le client DeepSeek"""
-        self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
-        self.api_base = api_base or os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com/v1")
+        self.api_key, self.api_base = resolve_provider_settings("deepseek", api_key, api_base)
+        self.backend = DeepSeekCompatClient(self.api_key, self.api_base, self.transport)
+        self._is_native = False
+    
+    def _init_mock(self):
+        """Initialise le fournisseur local (réponses modèles ou rejouées, sans réseau ni clé)"""
+        mode = os.getenv("AI_MOCK_MODE", "template").lower()
+        self.api_key = MOCK_PROVIDER
+        self.api_base = f"mock://{mode}"
+        self.backend = create_mock_backend(mode)
+        self._is_native = False
+    
+    def _native_timeout(self):
+        """Timeouts connexion/lecture du transport appliqués au client OpenAI natif"""
+        import httpx
+        return httpx.Timeout(self.transport.read_timeout, connect=self.transport.connect_timeout)
+    
+    def create_completion(self, **kwargs) -> Union[CompletionResponse, CompletionStream]:
+        """
+        Crée une complétion de chat avec retries (backoff exponentiel, Retry-After), circuit breaker
+        et limitation de débit RPM/TPM côté client
         
-        if not self.api_key:
-            raise ValueError("DeepSeek API key is required. Set it as DEEPSEEK_API_KEY environment variable or pass it to the constructor.")
+        Le paramètre cache=False contourne le cache de réponses (générations créatives).
+        Le paramètre call_site étiquette l'appel dans la télémétrie (par défaut: la fonction appelante).
+        Avec stream=True, renvoie un CompletionStream (ni cache ni coalescence).
         
-        self.chat = DeepSeekCompatClient(self.api_key, self.api_base)
-        self._is_native = False
+        Raises:
+            AIProviderError: si le fournisseur échoue après tous les retries
+            CircuitOpenError: si le fournisseur est considéré comme indisponible
+            RateLimitTimeout: si le budget RPM/TPM reste indisponible trop longtemps
+        """
+        call_site = kwargs.pop("call_site", None) or infer_call_site()
+        start = time.monotonic()
+        if kwargs.get("model"):
+            kwargs["model"] = resolve_model(self.provider, kwargs["model"])
+        
+        if kwargs.get("stream"):
+            kwargs.pop("cache", None)
+            try:
+                stream = call_with_retry(
+                    lambda: self._open_stream(**kwargs),
+                    self.retry_policy,
+                    self.circuit_breaker
+                )
+            except Exception as error:
+                self._record_call(call_site, kwargs, start, error=error)
+                raise
+            return self._observe_stream(stream, call_site, kwargs, start)
+        
+        use_cache = kwargs.pop("cache", True) and self.cache is not None
+        request_key = completion_cache_key(self.provider, kwargs)
+        
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                self._record_call(call_site, kwargs, start, response=cached, cache_hit=True)
+                return CompletionResponse(cached)
+        
+        executed = []
+        
+        def call_provider():
+            executed.append(True)
+            response = call_with_retry(
+                lambda: self._rate_limited_send(**kwargs),
+                self.retry_policy,
+                self.circuit_breaker
+            )
+            if use_cache:
+                self.cache.set(request_key, response)
+            return response
+        
+        try:
+            if self.single_flight is None:
+                response = call_provider()
+            else:
+                # Les requêtes identiques en cours partagent un seul appel au fournisseur
+                response = self.single_flight.do(f"{self.api_base}|{request_key}", call_provider)
+        except Exception as error:
+            self._record_call(call_site, kwargs, start, error=error)
+            raise
+        
+        # Un appel regroupé n'a rien coûté : il est compté comme une réponse partagée
+        self._record_call(call_site, kwargs, start, response=response, cache_hit=not executed)
+        return response
+    
+    def _record_call(self, call_site, kwargs, start, response=None, cache_hit=False, error=None,
+                     completion_tokens=None):
+        """Enregistre latence, tokens et issue d'un appel dans la télémétrie"""
+        if self.telemetry is None:
+            return
+        usage = (response or {}).get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens is None and completion_tokens is not None:
+            prompt_tokens = estimate_tokens(kwargs.get("messages"))
+        self.telemetry.record(
+            call_site=call_site,
+            provider=self.provider,
+            model=kwargs.get("model") or (response or {}).get("model"),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=usage.get("completion_tokens", completion_tokens),
+            latency_ms=(time.monotonic() - start) * 1000,
+            cache_hit=cache_hit,
+            error=type(error).__name__ if error is not None else None
+        )
+    
+    def _observe_stream(self, stream: CompletionStream, call_site, kwargs, start) -> CompletionStream:
+        """Enregistre l'appel quand le flux se termine (tokens de sortie estimés sur le texte reçu)"""
+        if self.telemetry is None:
+            return stream
+        
+        def chunks():
+            chars = 0
+            error = None
+            try:
+                for chunk in stream:
+                    for choice in chunk.get("choices") or []:
+                        chars += len((choice.get("delta") or {}).get("content") or "")
+                    yield chunk
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self._record_call(call_site, kwargs, start, error=error, completion_tokens=chars // 4)
+        
+        return CompletionStream(chunks())
+    
+    def _rate_limited_send(self, **kwargs) -> CompletionResponse:
+        """Réserve le budget estimé, appelle le fournisseur puis ajuste avec l'usage réel"""
+        reserved = self.rate_limiter.acquire(
+            estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens") or 1000)
+        )
+        response = self._send(**kwargs)
+        usage = response.get("usage") or {}
+        self.rate_limiter.reconcile(reserved, usage.get("total_tokens"))
+        return response
+    
+    def _open_stream(self, **kwargs) -> CompletionStream:
+        """Ouvre le flux (les erreurs HTTP surviennent ici et sont donc réessayées)"""
+        self.rate_limiter.acquire(
+            estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens") or 1000)
+        )
+        if self._is_native:
+            stream = self._call_native(**kwargs)
+            return CompletionStream(chunk.model_dump() for chunk in stream)
+        
+        return CompletionStream(self._call_compat(**kwargs))
+    
+    def _send(self, **kwargs) -> CompletionResponse:
+        """Un appel unique au fournisseur, erreurs converties en AIProviderError"""
+        if self._is_native:
+            return CompletionResponse(self._call_native(**kwargs).model_dump())
+        return CompletionResponse(self._call_compat(**kwargs))
+    
+    def _call_native(self, **kwargs):
+        import openai
+        try:
+            return self.backend.create(**kwargs)
+        except openai.APIStatusError as e:
+            raise AIProviderError(
+                e.message,
+                status_code=e.status_code,
+                retry_after=parse_retry_after(e.response.headers.get("retry-after")),
+                provider=self.provider
+            ) from e
+        except openai.APIConnectionError as e:
+            raise AIProviderError(str(e), provider=self.provider) from e
+    
+    def _call_compat(self, **kwargs):
+        result = self.backend.create(**kwargs)
+        if isinstance(result, dict) and "error" in result:
+            error = result["error"]
+            raise AIProviderError(
+                error.get("message", "Unknown API error"),
+                status_code=error.get("code"),
+                retry_after=error.get("retry_after"),
+                provider=self.provider
+            )
+        return result
     
     def is_native_client(self):
         """Vérifie si le client est natif ou une implémentation personnalisée"""
         return self._is_native
+    
+    def transport_stats(self):
+        """Statistiques de réutilisation des connexions du transport HTTP"""
+        return self.transport.stats()
+    
+    def circuit_state(self):
+        """État du circuit breaker du fournisseur"""
+        return self.circuit_breaker.snapshot()
+    
+    def rate_limit_budget(self):
+        """Budget RPM/TPM disponible pour le fournisseur"""
+        return self.rate_limiter.budget()
+
+
+class ChatNamespace:
+    """
+    Espace de noms chat.completions, comme le client OpenAI
+    """
+    
+    def __init__(self, client: AIClient):
+        self.completions = ChatCompletionsProxy(client)
+
+
+class ChatCompletionsProxy:
+    
+    def __init__(self, client: AIClient):
+        self._client = client
+    
+    def create(self, **kwargs) -> Union[CompletionResponse, CompletionStream]:
+        return self._client.create_completion(**kwargs)
 
 
 class OpenAICompatClient:
@@ -75,9 +459,10 @@ class OpenAICompatClient:
     Client compatible avec l'API OpenAI
     """
     
-    def __init__(self, api_key, api_base):
+    def __init__(self, api_key, api_base, transport: Optional[HTTPTransport] = None):
         self.api_key = api_key
         self.api_base = api_base
+        self.transport = transport or get_default_transport()
         self.completions = self
     
     def create(self, 
@@ -88,9 +473,10 @@ class OpenAICompatClient:
                top_p: float = 1.0,
                frequency_penalty: float = 0.0,
                presence_penalty: float = 0.0,
-               stop: Optional[Union[str, List[str]]] = None) -> Dict[str, Any]:
+               stop: Optional[Union[str, List[str]]] = None,
+               stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
-        Crée une complétion de chat
+        Crée une complétion de chat (itérateur de chunks si stream=True)
         """
         if not messages:
             messages = [{"role": "user", "content": "Hello"}]
@@ -115,15 +501,22 @@ class OpenAICompatClient:
         if stop:
             data["stop"] = stop
         
+        if stream:
+            data["stream"] = True
+        
+        response = None
         try:
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = self.transport.post(url, headers=headers, data=json.dumps(data), stream=stream)
             response.raise_for_status()
+            
+            if stream:
+                return iter_sse_chunks(response)
             return response.json()
             
         except requests.exceptions.RequestException as e:
             error_msg = str(e)
             try:
-                if response and response.text:
+                if response is not None and response.text:
                     error_data = response.json()
                     if "error" in error_data:
                         error_msg = error_data["error"].get("message", str(e))
@@ -134,7 +527,8 @@ class OpenAICompatClient:
                 "error": {
                     "message": error_msg,
                     "type": "api_error",
-                    "code": response.status_code if response else 500
+                    "code": response.status_code if response is not None else None,
+                    "retry_after": parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
                 }
             }
 
@@ -144,9 +538,10 @@ class DeepSeekCompatClient:
     Client compatible avec l'API DeepSeek
     """
     
-    def __init__(self, api_key, api_base):
+    def __init__(self, api_key, api_base, transport: Optional[HTTPTransport] = None):
         self.api_key = api_key
         self.api_base = api_base
+        self.transport = transport or get_default_transport()
         self.completions = self
     
     def create(self, 
@@ -157,9 +552,10 @@ class DeepSeekCompatClient:
                top_p: float = 1.0,
                frequency_penalty: float = 0.0,
                presence_penalty: float = 0.0,
-               stop: Optional[Union[str, List[str]]] = None) -> Dict[str, Any]:
+               stop: Optional[Union[str, List[str]]] = None,
+               stream: bool = False) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
         """
-        Crée une complétion de chat
+        Crée une complétion de chat (itérateur de chunks si stream=True)
         """
         if not messages:
             messages = [{"role": "user", "content": "Hello"}]
@@ -184,39 +580,24 @@ class DeepSeekCompatClient:
         if stop:
             data["stop"] = stop
         
+        if stream:
+            data["stream"] = True
+        
+        response = None
         try:
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = self.transport.post(url, headers=headers, data=json.dumps(data), stream=stream)
             response.raise_for_status()
             
-            result = response.json()
+            if stream:
+                return iter_sse_chunks(response)
             
             # Adapter le format si nécessaire (DeepSeek vers OpenAI)
-            if "choices" not in result and "response" in result:
-                formatted_result = {
-                    "id": result.get("id", "deepseek-response"),
-                    "object": "chat.completion",
-                    "created": result.get("created", 0),
-                    "model": model,
-                    "choices": [
-                        {
-                            "index": 0,
-                            "message": {
-                                "role": "assistant",
-                                "content": result.get("response", "")
-                            },
-                            "finish_reason": "stop"
-                        }
-                    ],
-                    "usage": result.get("usage", {})
-                }
-                return formatted_result
-            
-            return result
+            return normalize_completion(response.json(), model)
             
         except requests.exceptions.RequestException as e:
             error_msg = str(e)
             try:
-                if response and response.text:
+                if response is not None and response.text:
                     error_data = response.json()
                     if "error" in error_data:
                         error_msg = error_data["error"].get("message", str(e))
@@ -227,7 +608,8 @@ class DeepSeekCompatClient:
                 "error": {
                     "message": error_msg,
                     "type": "api_error",
-                    "code": response.status_code if response else 500
+                    "code": response.status_code if response is not None else None,
+                    "retry_after": parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
                 }
             }
 
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from src.ai_cache import completion_cache_key
+from src.ai_rate_limiter import estimate_tokens
+
+MOCK_PROVIDER = "mock"
+
+# Réponses types, reconnues d'après le prompt (voir MockCompletionBackend.classify)
+DEFAULT_TEMPLATES = {
+    "urls": (
+        "https://www.oceanconservancy.org\n"
+        "https://www.surfrider.org\n"
+        "https://www.patagonia.com/activism\n"
+        "https://www.5gyres.org\n"
+        "https://www.plasticpollutioncoalition.org"
+    ),
+    "email": (
+        "SUBJECT: {organization} x Second Life NGO: AI-powered beach cleanup partnership\n"
+        "BODY: Dear {organization} team,\n\n"
+        "Your commitment to sustainability and environmental action caught our attention. "
+        "Second Life NGO uses AI-powered drones to map plastic pollution on beaches and turn "
+        "waste data into targeted cleanup operations.\n\n"
+        "We would love to explore a partnership with {organization}, from sponsored cleanups "
+        "to shared impact reporting for your CSR initiatives.\n\n"
+        "Would you be open to a 15-minute call next week?\n\n"
+        "Best regards,\nSecond Life NGO"
+    ),
+    "social_media": (
+        "LINKEDIN_MESSAGE: Hi! I admire {organization}'s sustainability work and would love to "
+        "share how Second Life NGO uses AI to make beach cleanups more efficient.\n"
+        "TWITTER: Great to see {organization} leading on sustainability! Our AI drones map beach "
+        "pollution for smarter cleanups. Let's talk partnerships #AI #Sustainability\n"
+        "LINKEDIN_POST: Organizations like {organization} show how business can drive environmental "
+        "change. At Second Life NGO, AI-powered drones map plastic pollution so cleanup teams go "
+        "where they matter most. We are looking for partners who share this mission."
+    ),
+    "call_script": (
+        "OPENING: \"Hi, this is [Name] from Second Life NGO. I'm calling because of {organization}'s "
+        "commitment to sustainability.\"\n\n"
+        "VALUE PROP: \"We use drones and AI to map plastic pollution on beaches, so cleanup teams "
+        "focus where the waste actually is.\"\n\n"
+        "ENGAGEMENT: \"How does environmental technology fit into your current CSR plans?\"\n\n"
+        "OBJECTIONS: \"Budget is tight\" -> \"We offer in-kind and volunteer partnerships too.\"\n\n"
+        "NEXT STEPS: \"Could we schedule a 15-minute call to explore collaboration?\""
+    ),
+    "default": "This is a mock response for {organization}."
+}
+
+_ORGANIZATION_PATTERNS = [
+    r"Organization:\s*(.+)",
+    r"personalized email to (.+?) for Second Life",
+    r"engage (.+?) about",
+    r"reaching out to (.+?) about",
+    r"outreach email for (.+?)\."
+]
+
+
+def replay_key(params: Dict[str, Any]) -> str:
+    """
+    Clé d'une requête enregistrée (le mode streaming n'en fait pas partie)
+    """
+    return completion_cache_key(MOCK_PROVIDER, {k: v for k, v in params.items() if k != "stream"})
+
+
+def _completion_payload(content: str, model: str, messages) -> Dict[str, Any]:
+    prompt_tokens = estimate_tokens(messages)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "mock-" + hashlib.sha1(content.encode("utf-8")).hexdigest()[:12],
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def _stream_chunks(content: str, model: str) -> Iterator[Dict[str, Any]]:
+    for piece in re.findall(r"\S+\s*|\s+", content):
+        yield {
+            "id": "mock-stream",
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+
+
+def _completion_text(response: Dict[str, Any]) -> str:
+    choices = response.get("choices") or [{}]
+    return (choices[0].get("message") or {}).get("content", "")
+
+
+def _as_dict(value) -> Dict[str, Any]:
+    return value.model_dump() if hasattr(value, "model_dump") else value
+
+
+class MockCompletionBackend:
+    """
+    Fournisseur local : réponses au format chat-completions générées à partir de modèles,
+    avec latence et taux d'erreur configurables
+    """
+
+    def __init__(self, latency_ms=None, jitter_ms=None, error_rate=None, templates=None, seed=None):
+        """
+        Args:
+            latency_ms: Latence simulée par appel en millisecondes (AI_MOCK_LATENCY_MS)
+            jitter_ms: Variation aléatoire ajoutée à la latence (AI_MOCK_JITTER_MS)
+            error_rate: Proportion d'appels en erreur 500 simulée (AI_MOCK_ERROR_RATE)
+            templates: Modèles de réponses remplaçant ceux par défaut, par type de prompt
+                (AI_MOCK_RESPONSES: fichier JSON)
+            seed: Graine du générateur aléatoire (latence et erreurs)
+        """
+        self.latency_ms = float(latency_ms if latency_ms is not None else os.getenv("AI_MOCK_LATENCY_MS", 0))
+        self.jitter_ms = float(jitter_ms if jitter_ms is not None else os.getenv("AI_MOCK_JITTER_MS", 0))
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv("AI_MOCK_ERROR_RATE", 0))
+        self.templates = dict(DEFAULT_TEMPLATES)
+        if templates is None and os.getenv("AI_MOCK_RESPONSES"):
+            with open(os.getenv("AI_MOCK_RESPONSES"), "r", encoding="utf-8") as f:
+                templates = json.load(f)
+        self.templates.update(templates or {})
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.completions = self
+
+    def classify(self, messages: List[Dict[str, str]]) -> str:
+        prompt = "\n".join(str(message.get("content", "")) for message in messages or [])
+        if "SUBJECT:" in prompt and "BODY:" in prompt:
+            return "email"
+        if "LINKEDIN_MESSAGE" in prompt:
+            return "social_media"
+        if "call script" in prompt:
+            return "call_script"
+        if "separated by commas" in prompt:
+            return "scores"
+        if "URL" in prompt:
+            return "urls"
+        return "default"
+
+    def render(self, messages: List[Dict[str, str]]) -> str:
+        kind = self.classify(messages)
+        prompt = "\n".join(str(message.get("content", "")) for message in messages or [])
+
+        if kind == "scores" and "scores" not in self.templates:
+            # Scores stables pour un même prompt, entre 3 et 9
+            digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+            return ",".join(str(3 + digest[i] % 7) for i in range(4))
+
+        if "{organization_name}" in prompt:
+            # Demande de modèle : le placeholder est conservé tel quel
+            organization = "{organization_name}"
+        else:
+            organization = "your organization"
+            for pattern in _ORGANIZATION_PATTERNS:
+                match = re.search(pattern, prompt)
+                if match:
+                    organization = match.group(1).strip()
+                    break
+        return self.templates.get(kind, self.templates["default"]).replace("{organization}", organization)
+
+    def _simulate(self) -> bool:
+        with self._lock:
+            delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return failed
+
+    def create(self, model: str = "mock-model", messages: List[Dict[str, str]] = None,
+               stream: bool = False, **kwargs) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        if self._simulate():
+            return {"error": {"message": "Simulated provider error", "type": "api_error", "code": 500, "retry_after": None}}
+
+        content = self.render(messages)
+        if stream:
+            return _stream_chunks(content, model)
+        return _completion_payload(content, model, messages)
+
+
+class RecordingBackend:
+    """
+    Enveloppe un fournisseur réel et ajoute chaque réponse à un fichier JSONL (AI_RECORD_FILE)
+    """
+
+    def __init__(self, backend, path: str):
+        self.backend = backend
+        self.path = path
+        self._lock = threading.Lock()
+        self.completions = self
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, params: Dict[str, Any], response: Dict[str, Any]):
+        line = json.dumps({
+            "key": replay_key(params),
+            "request": {k: v for k, v in params.items() if k != "stream"},
+            "response": response
+        }, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def create(self, **kwargs):
+        result = self.backend.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(result, kwargs)
+
+        payload = _as_dict(result)
+        if not (isinstance(payload, dict) and "error" in payload):
+            self._write(kwargs, payload)
+        return result
+
+    def _record_stream(self, chunks, params) -> Iterator[Any]:
+        # Le flux est enregistré comme une complétion unique, une fois terminé
+        pieces = []
+        for chunk in chunks:
+            for choice in _as_dict(chunk).get("choices") or []:
+                pieces.append((choice.get("delta") or {}).get("content") or "")
+            yield chunk
+        self._write(params, _completion_payload("".join(pieces), params.get("model"), params.get("messages")))
+
+
+class ReplayBackend:
+    """
+    Rejoue de façon déterministe les réponses d'un fichier JSONL enregistré (AI_MOCK_FILE)
+
+    Plusieurs enregistrements d'une même requête sont rejoués dans l'ordre, en boucle.
+    """
+
+    def __init__(self, path: Optional[str] = None, latency_ms=None):
+        """
+        Args:
+            path: Fichier produit par RecordingBackend
+            latency_ms: Latence simulée par appel en millisecondes (AI_MOCK_LATENCY_MS)
+        """
+        self.path = path or os.getenv("AI_MOCK_FILE")
+        if not self.path:
+            raise ValueError("Replay mode needs a recording file. Set AI_MOCK_FILE or pass it to the constructor.")
+        self.latency_ms = float(latency_ms if latency_ms is not None else os.getenv("AI_MOCK_LATENCY_MS", 0))
+        self._responses = defaultdict(list)
+        self._positions = defaultdict(int)
+        self._lock = threading.Lock()
+        self.completions = self
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses[entry["key"]].append(entry["response"])
+
+    def __len__(self):
+        return sum(len(responses) for responses in self._responses.values())
+
+    def create(self, stream: bool = False, **kwargs) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        key = replay_key(kwargs)
+        with self._lock:
+            responses = self._responses.get(key)
+            if responses:
+                response = responses[self._positions[key] % len(responses)]
+                self._positions[key] += 1
+
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        if not responses:
+            return {"error": {"message": "No recorded response for this request", "type": "api_error",
+                              "code": 404, "retry_after": None}}
+        if stream:
+            return _stream_chunks(_completion_text(response), response.get("model") or kwargs.get("model"))
+        return response
+
+
+def create_mock_backend(mode: Optional[str] = None):
+    """
+    Backend du fournisseur 'mock' selon AI_MOCK_MODE : 'template' (par défaut) ou 'replay'
+    """
+    mode = (mode or os.getenv("AI_MOCK_MODE", "template")).lower()
+    if mode == "replay":
+        return ReplayBackend()
+    if mode == "template":
+        return MockCompletionBackend()
+    raise ValueError("AI_MOCK_MODE must be 'template' or 'replay'")
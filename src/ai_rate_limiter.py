@@ -0,0 +1,252 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'ai_rate_limit.db')
+
+
+class RateLimitTimeout(Exception):
+    """
+    Le budget de requêtes/tokens n'a pas été disponible dans le délai d'attente maximum
+    """
+
+
+def estimate_tokens(messages: Optional[List[Dict[str, str]]], max_tokens: Optional[int] = None) -> int:
+    """
+    Estime les tokens consommés par un appel : ~4 caractères par token pour le prompt,
+    plus le maximum de tokens demandés en sortie
+    """
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in (messages or []))
+    prompt_tokens = prompt_chars // 4 + 4 * len(messages or [])
+    return prompt_tokens + int(max_tokens or 0)
+
+
+def _refill(requests_available, tokens_available, elapsed, rpm, tpm):
+    if rpm:
+        requests_available = min(rpm, requests_available + elapsed * rpm / 60.0)
+    if tpm:
+        tokens_available = min(tpm, tokens_available + elapsed * tpm / 60.0)
+    return requests_available, tokens_available
+
+
+def _wait_time(requests_available, tokens_available, tokens, rpm, tpm):
+    wait = 0.0
+    if rpm and requests_available < 1:
+        wait = max(wait, (1 - requests_available) * 60.0 / rpm)
+    if tpm and tokens_available < tokens:
+        wait = max(wait, (tokens - tokens_available) * 60.0 / tpm)
+    return wait
+
+
+class MemoryBucketBackend:
+    """
+    Seaux partagés entre les threads d'un même processus
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _state(self, name, rpm, tpm, now):
+        requests_available, tokens_available, updated_at = self._buckets.get(name, (rpm, tpm, now))
+        requests_available, tokens_available = _refill(
+            requests_available, tokens_available, now - updated_at, rpm, tpm
+        )
+        return requests_available, tokens_available
+
+    def try_acquire(self, name, tokens, rpm, tpm) -> float:
+        with self._lock:
+            now = time.monotonic()
+            requests_available, tokens_available = self._state(name, rpm, tpm, now)
+            wait = _wait_time(requests_available, tokens_available, tokens, rpm, tpm)
+            if wait == 0:
+                requests_available -= 1
+                tokens_available -= tokens
+            self._buckets[name] = (requests_available, tokens_available, now)
+            return wait
+
+    def adjust_tokens(self, name, delta, rpm, tpm):
+        with self._lock:
+            now = time.monotonic()
+            requests_available, tokens_available = self._state(name, rpm, tpm, now)
+            tokens_available = min(tpm, tokens_available + delta) if tpm else tokens_available
+            self._buckets[name] = (requests_available, tokens_available, now)
+
+    def peek(self, name, rpm, tpm):
+        with self._lock:
+            return self._state(name, rpm, tpm, time.monotonic())
+
+
+class SQLiteBucketBackend:
+    """
+    Seaux stockés dans un fichier SQLite, partagés entre les workers gunicorn d'une même machine
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv("AI_RATE_LIMIT_DB", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                name TEXT PRIMARY KEY,
+                requests_available REAL,
+                tokens_available REAL,
+                updated_at REAL
+            )
+        ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _update(self, name, rpm, tpm, apply):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute(
+                'SELECT requests_available, tokens_available, updated_at FROM rate_limit_buckets WHERE name = ?',
+                (name,)
+            ).fetchone()
+            requests_available, tokens_available, updated_at = row if row else (rpm, tpm, now)
+            requests_available, tokens_available = _refill(
+                requests_available, tokens_available, max(now - updated_at, 0), rpm, tpm
+            )
+            requests_available, tokens_available, result = apply(requests_available, tokens_available)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_buckets VALUES (?, ?, ?, ?)',
+                (name, requests_available, tokens_available, now)
+            )
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def try_acquire(self, name, tokens, rpm, tpm) -> float:
+        def apply(requests_available, tokens_available):
+            wait = _wait_time(requests_available, tokens_available, tokens, rpm, tpm)
+            if wait == 0:
+                return requests_available - 1, tokens_available - tokens, 0.0
+            return requests_available, tokens_available, wait
+        return self._update(name, rpm, tpm, apply)
+
+    def adjust_tokens(self, name, delta, rpm, tpm):
+        def apply(requests_available, tokens_available):
+            if tpm:
+                tokens_available = min(tpm, tokens_available + delta)
+            return requests_available, tokens_available, None
+        self._update(name, rpm, tpm, apply)
+
+    def peek(self, name, rpm, tpm):
+        return self._update(name, rpm, tpm, lambda r, t: (r, t, (r, t)))
+
+
+class RateLimiter:
+    """
+    Limiteur client (token bucket) sur les requêtes par minute et les tokens par minute
+    """
+
+    def __init__(self, name, rpm=None, tpm=None, backend=None, max_wait=None):
+        """
+        Args:
+            name: Nom du seau (un par fournisseur)
+            rpm: Requêtes par minute autorisées, 0 = illimité (AI_RATE_LIMIT_RPM)
+            tpm: Tokens par minute autorisés, 0 = illimité (AI_RATE_LIMIT_TPM)
+            backend: MemoryBucketBackend ou SQLiteBucketBackend
+            max_wait: Attente maximum en secondes avant RateLimitTimeout (AI_RATE_LIMIT_MAX_WAIT)
+        """
+        self.name = name
+        self.rpm = float(rpm if rpm is not None else os.getenv("AI_RATE_LIMIT_RPM", 0))
+        self.tpm = float(tpm if tpm is not None else os.getenv("AI_RATE_LIMIT_TPM", 0))
+        self.backend = backend or MemoryBucketBackend()
+        self.max_wait = float(max_wait if max_wait is not None else os.getenv("AI_RATE_LIMIT_MAX_WAIT", 120))
+
+    @property
+    def enabled(self):
+        return bool(self.rpm or self.tpm)
+
+    def acquire(self, tokens: int = 0) -> int:
+        """
+        Bloque jusqu'à ce qu'une requête de `tokens` tokens tienne dans le budget
+
+        Returns:
+            Le nombre de tokens réservés (plafonné à la capacité du seau)
+        """
+        if not self.enabled:
+            return tokens
+        if self.tpm:
+            tokens = min(tokens, int(self.tpm))
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self.backend.try_acquire(self.name, tokens, self.rpm, self.tpm)
+            if wait == 0:
+                return tokens
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(
+                    f"Rate limit budget for '{self.name}' not available within {self.max_wait:.0f}s"
+                )
+            time.sleep(min(wait, 1.0))
+
+    def reconcile(self, reserved: int, actual: Optional[int]):
+        """
+        Rend au seau la différence entre les tokens réservés et ceux réellement consommés
+        """
+        if not self.enabled or not self.tpm or actual is None:
+            return
+        delta = reserved - actual
+        if delta:
+            self.backend.adjust_tokens(self.name, delta, self.rpm, self.tpm)
+
+    def budget(self) -> Dict[str, Any]:
+        """
+        Budget courant : requêtes et tokens disponibles immédiatement
+        """
+        if not self.enabled:
+            return {"name": self.name, "enabled": False}
+        requests_available, tokens_available = self.backend.peek(self.name, self.rpm, self.tpm)
+        return {
+            "name": self.name,
+            "enabled": True,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "requests_available": round(requests_available, 2) if self.rpm else None,
+            "tokens_available": round(tokens_available, 2) if self.tpm else None,
+            "backend": type(self.backend).__name__
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_shared_backend = None
+
+
+def _default_backend():
+    global _shared_backend
+    if _shared_backend is None:
+        if os.getenv("AI_RATE_LIMIT_BACKEND", "sqlite").lower() == "memory":
+            _shared_backend = MemoryBucketBackend()
+        else:
+            _shared_backend = SQLiteBucketBackend()
+    return _shared_backend
+
+
+def get_rate_limiter(name) -> RateLimiter:
+    """
+    Retourne le limiteur partagé d'un fournisseur (configuré par variables d'environnement)
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            limiter = RateLimiter(name, backend=MemoryBucketBackend())
+            if limiter.enabled:
+                limiter.backend = _default_backend()
+            _limiters[name] = limiter
+        return _limiters[name]
@@ -0,0 +1,223 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class AIProviderError(Exception):
+    """
+    Erreur renvoyée par un fournisseur d'API IA (statut HTTP, Retry-After éventuel)
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None, provider=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.provider = provider
+
+    @property
+    def is_retryable(self):
+        """Erreurs transitoires : réseau/timeout, throttling ou erreur serveur"""
+        if self.status_code is None:
+            return True
+        return self.status_code in RETRYABLE_STATUS_CODES or self.status_code >= 500
+
+    @property
+    def is_outage(self):
+        """Erreurs indiquant un fournisseur indisponible (comptées par le circuit breaker)"""
+        return self.status_code is None or self.status_code >= 500
+
+
+class CircuitOpenError(AIProviderError):
+    """
+    Le circuit du fournisseur est ouvert : l'appel échoue immédiatement
+    """
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """
+    Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes d'attente
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Backoff exponentiel avec jitter, qui respecte Retry-After
+    """
+
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None, jitter=True):
+        """
+        Args:
+            max_retries: Nombre de nouvelles tentatives après le premier échec (AI_MAX_RETRIES)
+            base_delay: Délai de base en secondes (AI_RETRY_BASE_DELAY)
+            max_delay: Délai maximum entre deux tentatives (AI_RETRY_MAX_DELAY)
+            jitter: Tirage aléatoire du délai ("full jitter") pour éviter les vagues synchronisées
+        """
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("AI_MAX_RETRIES", 3))
+        self.base_delay = float(base_delay if base_delay is not None else os.getenv("AI_RETRY_BASE_DELAY", 0.5))
+        self.max_delay = float(max_delay if max_delay is not None else os.getenv("AI_RETRY_MAX_DELAY", 30))
+        self.jitter = jitter
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def should_retry(self, error: AIProviderError, attempt: int) -> bool:
+        return (
+            not isinstance(error, CircuitOpenError)
+            and error.is_retryable
+            and attempt < self.max_retries
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker par fournisseur : fermé -> ouvert après N pannes -> semi-ouvert après le délai
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None):
+        """
+        Args:
+            name: Nom du fournisseur protégé
+            failure_threshold: Pannes consécutives avant ouverture (AI_BREAKER_FAILURE_THRESHOLD)
+            recovery_timeout: Secondes avant une tentative de rétablissement (AI_BREAKER_RECOVERY_TIMEOUT)
+        """
+        self.name = name
+        self.failure_threshold = int(failure_threshold or os.getenv("AI_BREAKER_FAILURE_THRESHOLD", 5))
+        self.recovery_timeout = float(recovery_timeout or os.getenv("AI_BREAKER_RECOVERY_TIMEOUT", 30))
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name) -> CircuitBreaker:
+    """
+    Retourne le circuit breaker partagé d'un fournisseur (un par processus)
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def call_with_retry(func: Callable[[], Any],
+                    policy: RetryPolicy,
+                    breaker: Optional[CircuitBreaker] = None,
+                    sleep: Callable[[float], None] = time.sleep):
+    """
+    Exécute func avec retries et circuit breaker
+
+    func doit lever AIProviderError en cas d'échec du fournisseur. Toute autre exception est propagée
+    sans retry mais comptée comme une panne, pour ne pas laisser un essai semi-ouvert en suspens.
+    """
+    attempt = 0
+    while True:
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(
+                f"Circuit open for provider '{breaker.name}', retry in {breaker.retry_in():.0f}s",
+                provider=breaker.name,
+                retry_after=breaker.retry_in()
+            )
+        try:
+            result = func()
+        except AIProviderError as error:
+            if breaker is not None:
+                if error.is_outage:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if not policy.should_retry(error, attempt):
+                raise
+            sleep(policy.compute_delay(attempt, error.retry_after))
+            attempt += 1
+            continue
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+
+        if breaker is not None:
+            breaker.record_success()
+        return result
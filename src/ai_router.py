@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.ai_client import AIClient, ChatNamespace, PROVIDER_SETTINGS
+from src.ai_rate_limiter import RateLimitTimeout
+from src.ai_resilience import AIProviderError, CircuitBreaker
+from src.ai_telemetry import infer_call_site
+
+
+def should_fail_over(error) -> bool:
+    """
+    Erreurs qui justifient d'essayer un autre backend : panne, throttling ou budget local épuisé.
+    Une requête invalide (4xx non retryable) échouerait de la même façon ailleurs
+    """
+    if isinstance(error, RateLimitTimeout):
+        return True
+    return isinstance(error, AIProviderError) and error.is_retryable
+
+
+class LatencyTracker:
+    """
+    Statistiques glissantes d'un backend : latences récentes et taux d'erreur (moyenne exponentielle)
+    """
+
+    def __init__(self, window=200, error_alpha=0.2):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._error_alpha = error_alpha
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    def record_success(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            self.calls += 1
+            self.error_rate *= (1 - self._error_alpha)
+
+    def record_error(self):
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.error_rate = self.error_rate * (1 - self._error_alpha) + self._error_alpha
+
+    def percentile(self, pct) -> Optional[float]:
+        with self._lock:
+            if not self._latencies:
+                return None
+            return float(np.percentile(list(self._latencies), pct))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 4),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+class RoutingBackend:
+    """
+    Un fournisseur/modèle candidat du routeur
+    """
+
+    def __init__(self, client: AIClient, model: Optional[str] = None, model_map: Optional[Dict[str, str]] = None,
+                 name: Optional[str] = None):
+        """
+        Args:
+            client: AIClient du fournisseur
+            model: Modèle imposé pour ce backend (sinon celui demandé par l'appelant)
+            model_map: Correspondance modèle demandé -> modèle du backend
+            name: Nom du backend dans les statistiques (par défaut: fournisseur:modèle)
+        """
+        self.client = client
+        self._name = name
+        self.model = model
+        self.model_map = model_map or {}
+        self.tracker = LatencyTracker()
+
+    @property
+    def name(self):
+        return self._name or f"{self.client.provider}:{self.model or '*'}"
+
+    def resolve_model(self, requested):
+        return self.model_map.get(requested) or self.model or requested
+
+    def is_healthy(self, max_error_rate) -> bool:
+        return (
+            self.client.circuit_breaker.state != CircuitBreaker.OPEN
+            and self.tracker.error_rate < max_error_rate
+        )
+
+
+class RoutingAIClient:
+    """
+    Client multi-fournisseurs : envoie chaque appel au backend sain le plus rapide,
+    avec requête de couverture (hedging) optionnelle vers un second backend
+    """
+
+    def __init__(self, backends: List[RoutingBackend], hedge: Optional[bool] = None,
+                 hedge_percentile=None, hedge_min_delay=None, hedge_max_delay=None,
+                 max_error_rate=None, max_workers=None):
+        """
+        Args:
+            backends: Backends candidats
+            hedge: Active le hedging (AI_HEDGE_ENABLED)
+            hedge_percentile: Percentile de latence du backend principal après lequel
+                la requête de couverture part (AI_HEDGE_PERCENTILE, 95)
+            hedge_min_delay: Délai minimum avant hedging en secondes (AI_HEDGE_MIN_DELAY)
+            hedge_max_delay: Délai maximum avant hedging en secondes (AI_HEDGE_MAX_DELAY)
+            max_error_rate: Taux d'erreur au-delà duquel un backend est évité (AI_ROUTING_MAX_ERROR_RATE)
+            max_workers: Threads disponibles pour les appels couverts (AI_HEDGE_WORKERS)
+        """
+        if not backends:
+            raise ValueError("RoutingAIClient needs at least one backend")
+
+        self.backends = backends
+        if hedge is None:
+            hedge = os.getenv("AI_HEDGE_ENABLED", "0").lower() in ["1", "true", "yes"]
+        self.hedge = hedge
+        self.hedge_percentile = float(hedge_percentile or os.getenv("AI_HEDGE_PERCENTILE", 95))
+        self.hedge_min_delay = float(hedge_min_delay or os.getenv("AI_HEDGE_MIN_DELAY", 0.5))
+        self.hedge_max_delay = float(hedge_max_delay or os.getenv("AI_HEDGE_MAX_DELAY", 10))
+        self.max_error_rate = float(max_error_rate or os.getenv("AI_ROUTING_MAX_ERROR_RATE", 0.5))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(max_workers or os.getenv("AI_HEDGE_WORKERS", 16)),
+            thread_name_prefix="ai-hedge"
+        )
+        self._lock = threading.Lock()
+        self._hedge_stats = {"hedged": 0, "hedge_wins": 0, "failovers": 0}
+        self.provider = "router"
+        self.chat = ChatNamespace(self)
+
+    @classmethod
+    def from_env(cls, providers: Optional[List[str]] = None, **kwargs):
+        """
+        Construit le routeur à partir de AI_ROUTING_PROVIDERS (ex: "openai,deepseek")
+
+        Les fournisseurs autres qu'OpenAI utilisent leur modèle par défaut ('mock' garde le modèle demandé).
+        """
+        providers = providers or [
+            p.strip().lower() for p in os.getenv("AI_ROUTING_PROVIDERS", "openai").split(",") if p.strip()
+        ]
+        backends = []
+        for provider in providers:
+            client = AIClient(provider=provider)
+            settings = PROVIDER_SETTINGS.get(provider)
+            model = settings["default_model"] if settings and provider != "openai" else None
+            backends.append(RoutingBackend(client, model=model))
+        return cls(backends, **kwargs)
+
+    def ranked_backends(self) -> List[RoutingBackend]:
+        """
+        Backends sains triés par latence médiane (les backends sans mesure passent en premier)
+        """
+        healthy = [b for b in self.backends if b.is_healthy(self.max_error_rate)]
+        candidates = healthy or list(self.backends)
+        return sorted(candidates, key=lambda b: b.tracker.percentile(50) or 0.0)
+
+    def _call(self, backend: RoutingBackend, kwargs):
+        params = dict(kwargs)
+        params["model"] = backend.resolve_model(kwargs.get("model"))
+        start = time.monotonic()
+        try:
+            response = backend.client.create_completion(**params)
+        except Exception as error:
+            if should_fail_over(error):
+                backend.tracker.record_error()
+            raise
+        if not kwargs.get("stream"):
+            backend.tracker.record_success(time.monotonic() - start)
+        return response
+
+    def _hedge_delay(self, backend: RoutingBackend) -> float:
+        observed = backend.tracker.percentile(self.hedge_percentile)
+        if observed is None:
+            return self.hedge_max_delay
+        return min(max(observed, self.hedge_min_delay), self.hedge_max_delay)
+
+    def _count(self, stat):
+        with self._lock:
+            self._hedge_stats[stat] += 1
+
+    def create_completion(self, **kwargs):
+        # Étiquette résolue ici : les appels couverts s'exécutent dans un autre thread
+        kwargs["call_site"] = kwargs.get("call_site") or infer_call_site()
+        candidates = self.ranked_backends()
+
+        if self.hedge and len(candidates) > 1 and not kwargs.get("stream"):
+            return self._hedged_call(candidates[0], candidates[1], kwargs)
+
+        last_error = None
+        for index, backend in enumerate(candidates):
+            try:
+                if index > 0:
+                    self._count("failovers")
+                return self._call(backend, kwargs)
+            except Exception as error:
+                if not should_fail_over(error):
+                    raise
+                last_error = error
+        raise last_error
+
+    def _hedged_call(self, primary: RoutingBackend, secondary: RoutingBackend, kwargs):
+        first = self._executor.submit(self._call, primary, kwargs)
+        done, _ = wait([first], timeout=self._hedge_delay(primary))
+
+        if done:
+            if first.exception() is None or not should_fail_over(first.exception()):
+                return first.result()
+            self._count("failovers")
+            return self._call(secondary, kwargs)
+
+        # Le principal est lent : on lance la requête de couverture et on garde la première réponse
+        self._count("hedged")
+        second = self._executor.submit(self._call, secondary, kwargs)
+        pending = {first, second}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count("hedge_wins")
+                    return future.result()
+                last_error = future.exception()
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hedge_stats = dict(self._hedge_stats)
+        return {
+            "hedge_enabled": self.hedge,
+            **hedge_stats,
+            "backends": {
+                backend.name: {
+                    **backend.tracker.snapshot(),
+                    "provider": backend.client.provider,
+                    "healthy": backend.is_healthy(self.max_error_rate),
+                    "circuit_breaker": backend.client.circuit_state(),
+                    "rate_limit": backend.client.rate_limit_budget(),
+                    "hedge_delay": self._hedge_delay(backend)
+                }
+                for backend in self.backends
+            }
+        }
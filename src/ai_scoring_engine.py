@@ -7,17 +7,19 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, roc_auc_score
 import joblib
-import sqlite3
-import json
 from datetime import datetime
 import re
-import openai
+import threading
+from src import datastore
+from src.ai_client import AIClient, provider_api_key
+from src.prospect_contacts import load_contacts
 
 class AIProspectScoringEngine:
-    def __init__(self, api_key, db_path="donor_prospects.db"):
+    def __init__(self, api_key, db_path="donor_prospects.db", client=None):
         self.api_key = api_key
         self.db_path = db_path
-        self.client = openai.OpenAI(api_key=api_key)
+        self.client = client or AIClient(api_key=provider_api_key(api_key))
+        self.training_lock = threading.Lock()
         self.models = {}
         self.scalers = {}
         self.vectorizers = {}
@@ -102,7 +104,8 @@ class AIProspectScoringEngine:
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=50,
-                temperature=0.1
+                temperature=0.1,
+                call_site='generate_llm_insights'
             )
             
             scores_text = response.choices[0].message.content.strip()
@@ -211,20 +214,21 @@ class AIProspectScoringEngine:
     def train_models(self):
         training_data = self.create_training_data()
         
-        conn = sqlite3.connect(self.db_path)
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM prospects')
+        cursor.execute('SELECT id, url, organization_name, content_text, final_score FROM prospects')
         db_data = cursor.fetchall()
         conn.close()
+        contacts = load_contacts(self.db_path, [row[0] for row in db_data])
         
         for row in db_data:
             prospect = {
-                'content_text': row[6],
-                'emails': json.loads(row[3]),
-                'phones': json.loads(row[4]),
+                'content_text': row[3],
+                'emails': contacts[row[0]]['emails'],
+                'phones': contacts[row[0]]['phones'],
                 'url': row[1],
                 'organization_name': row[2],
-                'label': 1 if row[10] > 0.6 else 0
+                'label': 1 if row[4] > 0.6 else 0
             }
             training_data.append(prospect)
         
@@ -234,23 +238,30 @@ class AIProspectScoringEngine:
         X, feature_names = self.prepare_features(training_data)
         y = np.array([item['label'] for item in training_data])
         
-        self.models['random_forest'] = RandomForestClassifier(
+        self.fit_models(X, y, feature_names)
+        
+        print("Models trained successfully!")
+        return True
+    
+    def fit_models(self, X, y, feature_names):
+        models = {}
+        models['random_forest'] = RandomForestClassifier(
             n_estimators=100, 
             random_state=42,
             class_weight='balanced'
         )
         
-        self.models['gradient_boosting'] = GradientBoostingClassifier(
+        models['gradient_boosting'] = GradientBoostingClassifier(
             n_estimators=100,
             random_state=42
         )
         
-        self.models['logistic_regression'] = LogisticRegression(
+        models['logistic_regression'] = LogisticRegression(
             random_state=42,
             class_weight='balanced'
         )
         
-        for name, model in self.models.items():
+        for name, model in models.items():
             model.fit(X, y)
             
             if hasattr(model, 'feature_importances_'):
@@ -261,12 +272,19 @@ class AIProspectScoringEngine:
                     reverse=True
                 )[:10]
         
-        print("Models trained successfully!")
-        return True
+        # Published only once fitted, so concurrent scoring never sees a half-trained ensemble
+        self.models = models
+        return self.models
     
-    def score_prospect(self, prospect_data):
+    def ensure_models(self):
         if not self.models:
-            self.train_models()
+            with self.training_lock:
+                if not self.models:
+                    self.train_models()
+        return self.models
+    
+    def score_prospect(self, prospect_data):
+        self.ensure_models()
         
         X, _ = self.prepare_features([prospect_data])
         
@@ -304,18 +322,19 @@ class AIProspectScoringEngine:
             return "NOT_RECOMMENDED"
     
     def batch_score_prospects(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM prospects')
+        cursor.execute('SELECT id, url, organization_name, content_text FROM prospects')
         prospects = cursor.fetchall()
+        contacts = load_contacts(self.db_path, [row[0] for row in prospects])
         
         scored_prospects = []
         
         for row in prospects:
             prospect_data = {
-                'content_text': row[6],
-                'emails': json.loads(row[3]),
-                'phones': json.loads(row[4]),
+                'content_text': row[3],
+                'emails': contacts[row[0]]['emails'],
+                'phones': contacts[row[0]]['phones'],
                 'url': row[1],
                 'organization_name': row[2]
             }
@@ -0,0 +1,252 @@
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'ai_telemetry.db')
+
+# Prix indicatifs en USD pour 1K tokens : (prompt, complétion)
+MODEL_PRICING = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'deepseek-chat': (0.00027, 0.0011),
+    'deepseek-coder': (0.00027, 0.0011)
+}
+
+_CLIENT_MODULES = ('ai_client.py', 'ai_router.py', 'ai_singleflight.py', 'ai_resilience.py', 'ai_telemetry.py')
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Coût estimé d'un appel (0 si le modèle n'a pas de tarif connu)
+    """
+    pricing = MODEL_PRICING.get(model or '')
+    if pricing is None:
+        # Variantes datées : gpt-4-0613 -> gpt-4
+        matches = [name for name in MODEL_PRICING if (model or '').startswith(name)]
+        if not matches:
+            return 0.0
+        pricing = MODEL_PRICING[max(matches, key=len)]
+    return (prompt_tokens * pricing[0] + completion_tokens * pricing[1]) / 1000
+
+
+def infer_call_site(default: str = "unknown") -> str:
+    """
+    Nom de la première fonction appelante située hors de la couche client AI
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.endswith(_CLIENT_MODULES):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return default
+
+
+class TelemetryRecorder:
+    """
+    Métriques par appel LLM : agrégées en mémoire puis écrites périodiquement dans SQLite
+    """
+
+    def __init__(self, db_path=None, flush_interval=None, max_buffer=None):
+        """
+        Args:
+            db_path: Fichier SQLite des métriques (AI_TELEMETRY_DB)
+            flush_interval: Secondes entre deux écritures (AI_TELEMETRY_FLUSH_INTERVAL)
+            max_buffer: Nombre d'appels en mémoire déclenchant une écriture anticipée
+        """
+        self.db_path = db_path or os.getenv("AI_TELEMETRY_DB", DEFAULT_DB_PATH)
+        self.flush_interval = float(flush_interval or os.getenv("AI_TELEMETRY_FLUSH_INTERVAL", 10))
+        self.max_buffer = int(max_buffer or 1000)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = []
+        self._totals = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL,
+                call_site TEXT,
+                provider TEXT,
+                model TEXT,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER,
+                latency_ms REAL,
+                cache_hit INTEGER,
+                error TEXT,
+                cost REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_calls_site_time ON llm_calls (call_site, created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_calls_site_latency ON llm_calls (call_site, latency_ms)')
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _ensure_flusher(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="ai-telemetry", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+    def record(self, call_site, provider, model, prompt_tokens=0, completion_tokens=0,
+               latency_ms=0.0, cache_hit=False, error=None):
+        prompt_tokens = int(prompt_tokens or 0)
+        completion_tokens = int(completion_tokens or 0)
+        cost = 0.0 if cache_hit else estimate_cost(model, prompt_tokens, completion_tokens)
+        row = (
+            time.time(), call_site, provider, model, prompt_tokens, completion_tokens,
+            latency_ms, 1 if cache_hit else 0, error, cost
+        )
+        with self._lock:
+            self._buffer.append(row)
+            totals = self._totals.setdefault(call_site, {
+                "calls": 0, "errors": 0, "cache_hits": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0
+            })
+            totals["calls"] += 1
+            totals["errors"] += 1 if error else 0
+            totals["cache_hits"] += 1 if cache_hit else 0
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost"] += cost
+            should_flush = len(self._buffer) >= self.max_buffer
+
+        self._ensure_flusher()
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            conn = self._connect()
+            try:
+                conn.executemany('''
+                    INSERT INTO llm_calls
+                    (created_at, call_site, provider, model, prompt_tokens, completion_tokens,
+                     latency_ms, cache_hit, error, cost)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+            finally:
+                conn.close()
+            return len(rows)
+
+    def process_totals(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Compteurs en mémoire depuis le démarrage du processus
+        """
+        with self._lock:
+            return {site: dict(totals) for site, totals in self._totals.items()}
+
+    def summary(self, since_hours: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Latence p50/p95/p99, tokens et coût par call site (toutes les écritures, tous workers confondus)
+        """
+        self.flush()
+        since = time.time() - since_hours * 3600 if since_hours else 0
+
+        conn = self._connect()
+        try:
+            aggregates = conn.execute('''
+                SELECT call_site, COUNT(*), SUM(error IS NOT NULL), SUM(cache_hit),
+                       SUM(prompt_tokens), SUM(completion_tokens), SUM(cost)
+                FROM llm_calls
+                WHERE created_at >= ?
+                GROUP BY call_site
+            ''', (since,)).fetchall()
+
+            latencies = {
+                call_site: self._latency_percentiles(conn, call_site, since)
+                for call_site, *_ in aggregates
+            }
+        finally:
+            conn.close()
+
+        report = []
+        for call_site, calls, errors, cache_hits, prompt_tokens, completion_tokens, cost in aggregates:
+            report.append({
+                "call_site": call_site,
+                "calls": calls,
+                "errors": errors or 0,
+                "cache_hits": cache_hits or 0,
+                "prompt_tokens": prompt_tokens or 0,
+                "completion_tokens": completion_tokens or 0,
+                "total_tokens": (prompt_tokens or 0) + (completion_tokens or 0),
+                "cost_usd": round(cost or 0.0, 6),
+                "latency_ms": latencies.get(call_site)
+            })
+
+        report.sort(key=lambda item: item["cost_usd"], reverse=True)
+        return report
+
+    @staticmethod
+    def _latency_percentiles(conn, call_site, since) -> Optional[Dict[str, float]]:
+        """
+        Percentiles calculés dans SQLite (interpolation linéaire, comme numpy.percentile) :
+        seules deux latences par percentile sont lues, quel que soit le nombre d'appels
+        """
+        where = 'call_site = ? AND created_at >= ? AND error IS NULL AND cache_hit = 0'
+        count = conn.execute(f'SELECT COUNT(*) FROM llm_calls WHERE {where}', (call_site, since)).fetchone()[0]
+        if not count:
+            return None
+
+        percentiles = {}
+        for pct in (50, 95, 99):
+            rank = pct / 100 * (count - 1)
+            lower = int(rank)
+            values = [row[0] for row in conn.execute(f'''
+                SELECT latency_ms FROM llm_calls WHERE {where}
+                ORDER BY latency_ms LIMIT 2 OFFSET ?
+            ''', (call_site, since, lower))]
+            upper = values[1] if len(values) > 1 else values[0]
+            percentiles[f"p{pct}"] = float(values[0] + (upper - values[0]) * (rank - lower))
+        return percentiles
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+_default_recorder = None
+_default_recorder_lock = threading.Lock()
+
+
+def get_telemetry_recorder() -> Optional[TelemetryRecorder]:
+    """
+    Enregistreur partagé du processus, ou None si AI_TELEMETRY_ENABLED=0
+    """
+    global _default_recorder
+    if os.getenv("AI_TELEMETRY_ENABLED", "1").lower() not in ["1", "true", "yes"]:
+        return None
+    if _default_recorder is None:
+        with _default_recorder_lock:
+            if _default_recorder is None:
+                _default_recorder = TelemetryRecorder()
+    return _default_recorder
@@ -0,0 +1,112 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HTTPTransport:
+    """
+    Transport HTTP partagé pour les clients AI : session poolée, keep-alive et timeouts
+    """
+
+    def __init__(self,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None):
+        """
+        Initialise le transport
+
+        Args:
+            connect_timeout: Timeout d'établissement de connexion en secondes (AI_CONNECT_TIMEOUT)
+            read_timeout: Timeout de lecture en secondes (AI_READ_TIMEOUT)
+            pool_connections: Nombre d'hôtes gardés en cache (AI_POOL_CONNECTIONS)
+            pool_maxsize: Connexions maximum conservées par hôte (AI_POOL_MAXSIZE)
+        """
+        self.connect_timeout = float(connect_timeout or os.getenv("AI_CONNECT_TIMEOUT", 5))
+        self.read_timeout = float(read_timeout or os.getenv("AI_READ_TIMEOUT", 60))
+        self.pool_connections = int(pool_connections or os.getenv("AI_POOL_CONNECTIONS", 4))
+        self.pool_maxsize = int(pool_maxsize or os.getenv("AI_POOL_MAXSIZE", 16))
+
+        self._adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """
+        Envoie une requête POST via la session poolée (timeout par défaut appliqué)
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self._requests += 1
+        try:
+            return self.session.post(url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques de réutilisation des connexions du pool
+        """
+        pools = self._adapter.poolmanager.pools
+        connections_opened = 0
+        pool_requests = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            pool_requests += pool.num_requests
+
+        with self._lock:
+            requests_sent = self._requests
+            errors = self._errors
+
+        reused = max(pool_requests - connections_opened, 0)
+        return {
+            "requests": requests_sent,
+            "errors": errors,
+            "connections_opened": connections_opened,
+            "connections_reused": reused,
+            "reuse_ratio": reused / pool_requests if pool_requests else 0.0,
+            "hosts": len(pools),
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> HTTPTransport:
+    """
+    Retourne le transport partagé par tous les clients du processus
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HTTPTransport()
+    return _default_transport
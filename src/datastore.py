@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connexion SQLite dont close() la rend au pool du thread au lieu de la fermer
+    """
+    pool = None
+    db_path = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def discard(self):
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Connexions SQLite réutilisées par thread, en mode WAL et avec des pragmas réglés pour des lectures
+    concurrentes (crawler, scoring, outreach, routes) pendant les écritures
+    """
+
+    def __init__(self, max_idle=None, synchronous=None, cache_size_kb=None, mmap_size=None, busy_timeout_ms=None):
+        """
+        Args:
+            max_idle: Connexions inactives conservées par thread et par base (DB_POOL_SIZE)
+            synchronous: Niveau de synchronisation du journal WAL (DB_SYNCHRONOUS)
+            cache_size_kb: Cache de pages par connexion, en Ko (DB_CACHE_SIZE_KB)
+            mmap_size: Taille maximale du fichier projeté en mémoire, en octets (DB_MMAP_SIZE)
+            busy_timeout_ms: Attente maximale d'un verrou d'écriture (DB_BUSY_TIMEOUT_MS)
+        """
+        self.max_idle = int(max_idle or os.getenv('DB_POOL_SIZE', 4))
+        self.synchronous = synchronous or os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+        self.cache_size_kb = int(cache_size_kb or os.getenv('DB_CACHE_SIZE_KB', 32768))
+        self.mmap_size = int(mmap_size if mmap_size is not None else os.getenv('DB_MMAP_SIZE', 268435456))
+        self.busy_timeout_ms = int(busy_timeout_ms or os.getenv('DB_BUSY_TIMEOUT_MS', 30000))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0}
+
+    def _idle(self, db_path):
+        # Une connexion SQLite ne survit pas à un fork : un processus enfant repart de zéro
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.pid = os.getpid()
+            self._local.idle = {}
+        return self._local.idle.setdefault(db_path, [])
+
+    def _open(self, db_path):
+        conn = sqlite3.connect(db_path, timeout=self.busy_timeout_ms / 1000, factory=PooledConnection)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA cache_size=-{self.cache_size_kb}')
+        conn.execute(f'PRAGMA mmap_size={self.mmap_size}')
+        conn.execute(f'PRAGMA busy_timeout={self.busy_timeout_ms}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.pool = self
+        conn.db_path = db_path
+        return conn
+
+    def connect(self, db_path):
+        """
+        Connexion inactive du thread courant pour cette base, ou nouvelle connexion configurée.
+        Un appel imbriqué obtient une connexion distincte, comme avec sqlite3.connect
+        """
+        idle = self._idle(db_path)
+        if idle:
+            conn = idle.pop()
+            stat = 'reused'
+        else:
+            conn = self._open(db_path)
+            stat = 'opened'
+        with self._lock:
+            self.stats[stat] += 1
+        return conn
+
+    def release(self, conn):
+        # Comme sqlite3.Connection.close(), une transaction non validée est annulée
+        if conn.in_transaction:
+            conn.rollback()
+        idle = self._idle(conn.db_path)
+        if len(idle) < self.max_idle:
+            idle.append(conn)
+        else:
+            conn.discard()
+
+    @contextmanager
+    def transaction(self, db_path, immediate=False):
+        """
+        Transaction validée à la sortie du bloc et annulée en cas d'exception.
+        immediate=True prend le verrou d'écriture dès le début (lecture puis écriture sans conflit)
+        """
+        conn = self.connect(db_path)
+        try:
+            conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+_default_pool = ConnectionPool()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    Pool partagé par tous les modules du processus
+    """
+    return _default_pool
+
+
+def connect(db_path):
+    return _default_pool.connect(db_path)
+
+
+def transaction(db_path, immediate=False):
+    return _default_pool.transaction(db_path, immediate)
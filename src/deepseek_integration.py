@@ -3,18 +3,21 @@ import requests
 import json
 from typing import List, Dict, Any, Optional, Union
 
+from src.ai_transport import HTTPTransport, get_default_transport
+
 class DeepSeekClient:
     """
     Client pour l'API DeepSeek, compatible avec l'interface OpenAI
     """
     
-    def __init__(self, api_key: str = None, api_base: str = None):
+    def __init__(self, api_key: str = None, api_base: str = None, transport: Optional[HTTPTransport] = None):
         """
         Initialise le client DeepSeek
         
         Args:
             api_key: Clé API DeepSeek (par défaut: variable d'environnement DEEPSEEK_API_KEY)
             api_base: URL de base de l'API (par défaut: https://api.deepseek.com/v1)
+            transport: Transport HTTP poolé (par défaut: transport partagé du processus)
         """
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         self.api_base = api_base or os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com/v1")
@@ -23,16 +26,17 @@ class DeepSeekClient:
             raise ValueError("DeepSeek API key is required. Set it as DEEPSEEK_API_KEY environment variable or pass it to the constructor.")
         
         # Créer une structure similaire à celle du client OpenAI
-        self.chat = ChatCompletions(self.api_key, self.api_base)
+        self.chat = ChatCompletions(self.api_key, self.api_base, transport)
 
 class ChatCompletions:
     """
     Classe pour gérer les completions de chat, similaire à l'interface OpenAI
     """
     
-    def __init__(self, api_key: str, api_base: str):
+    def __init__(self, api_key: str, api_base: str, transport: Optional[HTTPTransport] = None):
         self.api_key = api_key
         self.api_base = api_base
+        self.transport = transport or get_default_transport()
     
     def create(self, 
                model: str = "deepseek-chat", 
@@ -85,9 +89,10 @@ class ChatCompletions:
         if stop:
             data["stop"] = stop
         
-        # Faire la requête
+        # Faire la requête via la session poolée (keep-alive + timeouts)
+        response = None
         try:
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = self.transport.post(url, headers=headers, data=json.dumps(data))
             response.raise_for_status()
             
             # Formater la réponse pour qu'elle ressemble à celle d'OpenAI
@@ -121,7 +126,7 @@ class ChatCompletions:
             # Gérer les erreurs et formater une réponse d'erreur compatible
             error_msg = str(e)
             try:
-                if response and response.text:
+                if response is not None and response.text:
                     error_data = response.json()
                     if "error" in error_data:
                         error_msg = error_data["error"].get("message", str(e))
@@ -133,7 +138,7 @@ class ChatCompletions:
                 "error": {
                     "message": error_msg,
                     "type": "deepseek_error",
-                    "code": response.status_code if response else 500
+                    "code": response.status_code if response is not None else 500
                 }
             }
 
@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from email.utils import formataddr, make_msgid
+
+from src import datastore
+
+logger = logging.getLogger(__name__)
+
+DELIVERED = 'delivered'
+FAILED = 'failed'
+
+DELIVERY_COLUMNS = {
+    'delivery_status': 'TEXT',
+    'delivery_error': 'TEXT',
+    'message_id': 'TEXT',
+    'delivered_at': 'TIMESTAMP'
+}
+
+def recipient_domain(address):
+    return address.rsplit('@', 1)[-1].lower()
+
+class DomainThrottle:
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, domain):
+        if not self.interval:
+            return
+        # Slots are reserved under the lock and slept outside it, so other domains are not held up
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, 0))
+            self._next_slot[domain] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class SMTPConnectionPool:
+    def __init__(self, host=None, port=None, username=None, password=None, use_tls=None, size=None,
+                 timeout=None, max_idle=None):
+        self.host = host or os.getenv('SMTP_SERVER', 'localhost')
+        self.port = int(port or os.getenv('SMTP_PORT', 587))
+        self.username = username if username is not None else os.getenv('EMAIL_USERNAME')
+        self.password = password if password is not None else os.getenv('EMAIL_PASSWORD')
+        if use_tls is None:
+            use_tls = os.getenv('SMTP_USE_TLS', '1' if self.port == 587 else '0').lower() in ['1', 'true', 'yes']
+        self.use_tls = use_tls
+        self.size = int(size or os.getenv('SMTP_POOL_SIZE', 4))
+        self.timeout = float(timeout or os.getenv('SMTP_TIMEOUT', 30))
+        self.max_idle = float(max_idle or os.getenv('SMTP_MAX_IDLE', 60))
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0, 'discarded': 0}
+
+    def _connect(self):
+        if self.port == 465:
+            conn = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            conn.ehlo()
+            if self.use_tls:
+                conn.starttls(context=ssl.create_default_context())
+                conn.ehlo()
+        if self.username and self.password:
+            conn.login(self.username, self.password)
+        with self._lock:
+            self.stats['opened'] += 1
+        return conn
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - last_used <= self.max_idle:
+                    with self._lock:
+                        self.stats['reused'] += 1
+                    return conn
+                # Servers drop idle sessions: an old connection is replaced instead of failing the next send
+                self._close(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        try:
+            if broken:
+                self._close(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _close(self, conn):
+        with self._lock:
+            self.stats['discarded'] += 1
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+class EmailDeliveryChannel:
+    def __init__(self, outreach_engine=None, pool=None, sender=None, sender_name=None, batch_size=None,
+                 domain_rate=None, max_retries=None, retry_delay=None):
+        self.engine = outreach_engine
+        self.pool = pool or SMTPConnectionPool()
+        self.sender = sender or os.getenv('EMAIL_FROM') or os.getenv('EMAIL_USERNAME') or 'outreach@localhost'
+        self.sender_name = sender_name or os.getenv('EMAIL_FROM_NAME', 'Second Life NGO')
+        self.batch_size = int(batch_size or os.getenv('SMTP_BATCH_SIZE', 50))
+        self.throttle = DomainThrottle(float(domain_rate if domain_rate is not None else os.getenv('EMAIL_DOMAIN_RATE', 5)))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv('SMTP_MAX_RETRIES', 3))
+        self.retry_delay = float(retry_delay if retry_delay is not None else os.getenv('SMTP_RETRY_DELAY', 2))
+        self.executor = ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix='smtp-delivery')
+        if self.engine is not None:
+            self.setup_database()
+
+    def setup_database(self):
+        self.engine.ensure_campaign_tables()
+        conn = datastore.connect(self.engine.db_path)
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA table_info(outreach_steps)')
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in DELIVERY_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE outreach_steps ADD COLUMN {column} {column_type}')
+        conn.commit()
+        conn.close()
+
+    def build_message(self, step):
+        recipients = step['prospect'].get('emails') or []
+        if not recipients:
+            return None
+
+        try:
+            content = json.loads(step['content']) if isinstance(step['content'], str) else (step['content'] or {})
+        except ValueError:
+            content = {'body': step['content']}
+        if not isinstance(content, dict):
+            content = {'body': str(content)}
+
+        organization_name = step['prospect'].get('organization_name') or 'your organization'
+        message = MIMEText(content.get('body') or '', 'plain', 'utf-8')
+        message['Subject'] = content.get('subject') or f"Partnership opportunity with {organization_name}"
+        message['From'] = formataddr((self.sender_name, self.sender))
+        message['To'] = recipients[0]
+        message['Message-ID'] = make_msgid(domain=recipient_domain(self.sender))
+        return message
+
+    def is_transient(self, error):
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        # Disconnects, refused connections and timeouts
+        return isinstance(error, OSError)
+
+    def send_chunk(self, chunk):
+        results = {}
+        conn = None
+        try:
+            for step_id, message in chunk:
+                error = None
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        if conn is None:
+                            conn = self.pool.acquire()
+                        self.throttle.wait(recipient_domain(message['To']))
+                        conn.send_message(message)
+                        error = None
+                        break
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                        error = e
+                    except OSError as e:
+                        # The session is unusable: drop it and reconnect on the next attempt
+                        error = e
+                        if conn is not None:
+                            self.pool.release(conn, broken=True)
+                            conn = None
+                    if not self.is_transient(error) or attempt == self.max_retries:
+                        break
+                    time.sleep(self.retry_delay * (2 ** attempt))
+
+                if error is None:
+                    results[step_id] = {'status': DELIVERED, 'error': None, 'message_id': message['Message-ID']}
+                else:
+                    results[step_id] = {'status': FAILED, 'error': str(error)[:500], 'message_id': None}
+        finally:
+            if conn is not None:
+                self.pool.release(conn)
+        return results
+
+    def deliver(self, steps):
+        results = {}
+        messages = []
+        for step in steps:
+            message = self.build_message(step)
+            if message is None:
+                results[step['id']] = {'status': FAILED, 'error': 'No recipient email address', 'message_id': None}
+            else:
+                messages.append((step['id'], message))
+
+        # Each chunk is sent over one pooled connection; chunks run in parallel up to the pool size
+        chunks = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+        for chunk_results in self.executor.map(self.send_chunk, chunks):
+            results.update(chunk_results)
+
+        return results
+
+    def record_deliveries(self, results):
+        if not results:
+            return
+        conn = datastore.connect(self.engine.db_path)
+        conn.executemany('''
+            UPDATE outreach_steps
+            SET delivery_status = ?, delivery_error = ?, message_id = ?,
+                delivered_at = CASE WHEN ? = 'delivered' THEN CURRENT_TIMESTAMP ELSE delivered_at END
+            WHERE id = ?
+        ''', [
+            (result['status'], result['error'], result['message_id'], result['status'], step_id)
+            for step_id, result in results.items()
+        ])
+        conn.commit()
+        conn.close()
+
+    def __call__(self, steps):
+        # Channel handler for OutreachDispatcher: delivery details go to outreach_steps, the step state to the dispatcher
+        results = self.deliver(steps)
+        if self.engine is not None:
+            self.record_deliveries(results)
+        failed = [result['error'] for result in results.values() if result['status'] == FAILED]
+        if failed:
+            logger.warning(f"{len(failed)} of {len(results)} outreach emails failed, first error: {failed[0]}")
+        return {step_id: result['status'] == DELIVERED for step_id, result in results.items()}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.close()
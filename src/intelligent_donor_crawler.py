@@ -5,31 +5,25 @@ from urllib.parse import urljoin, urlparse
 from collections import deque
 import time
 import json
-import sqlite3
 from datetime import datetime
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import openai
+from src import datastore
+from src.ai_client import AIClient, provider_api_key
+from src.prospect_contacts import ensure_contact_store, load_contacts
 import logging
 
+logger = logging.getLogger(__name__)
+
 class IntelligentDonorCrawler:
-    def __init__(self, api_key, db_path="donor_prospects.db"):
+    def __init__(self, api_key, db_path="donor_prospects.db", client=None):
         self.api_key = api_key
         self.db_path = db_path
-        self.client = openai.OpenAI(api_key=api_key)
-        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.classifier = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.client = client or AIClient(api_key=provider_api_key(api_key))
+        self.logger = logger
         self.setup_database()
-        self.setup_logging()
-        
-    def setup_logging(self):
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
         
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS prospects (
@@ -49,6 +43,7 @@ class IntelligentDonorCrawler:
         ''')
         conn.commit()
         conn.close()
+        ensure_contact_store(self.db_path)
 
     def get_intelligent_urls(self, prompt_text):
         try:
@@ -60,6 +55,7 @@ class IntelligentDonorCrawler:
                 ],
                 max_tokens=300,
                 temperature=0.3,
+                call_site='get_intelligent_urls'
             )
             text = response.choices[0].message.content.strip()
             urls = re.findall(r'https?://(?:www\.)?[^\s/$.?#].[^\s]*', text)
@@ -259,40 +255,36 @@ class IntelligentDonorCrawler:
         }
 
     def save_prospect(self, prospect_data):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO prospects 
-                (url, organization_name, emails, phones, addresses, content_text, 
-                 sustainability_score, donation_probability, engagement_score, final_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                prospect_data['url'],
-                prospect_data['organization_name'],
-                json.dumps(prospect_data['emails']),
-                json.dumps(prospect_data['phones']),
-                json.dumps(prospect_data['addresses']),
-                prospect_data['content_text'],
-                prospect_data['sustainability_score'],
-                prospect_data['donation_probability'],
-                prospect_data['engagement_score'],
-                prospect_data['final_score']
-            ))
-            conn.commit()
+            with datastore.transaction(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO prospects 
+                    (url, organization_name, emails, phones, addresses, content_text, 
+                     sustainability_score, donation_probability, engagement_score, final_score)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    prospect_data['url'],
+                    prospect_data['organization_name'],
+                    json.dumps(prospect_data['emails']),
+                    json.dumps(prospect_data['phones']),
+                    json.dumps(prospect_data['addresses']),
+                    prospect_data['content_text'],
+                    prospect_data['sustainability_score'],
+                    prospect_data['donation_probability'],
+                    prospect_data['engagement_score'],
+                    prospect_data['final_score']
+                ))
             self.logger.info(f"Saved prospect: {prospect_data['organization_name']}")
         except Exception as e:
             self.logger.error(f"Error saving prospect: {e}")
-        finally:
-            conn.close()
 
     def get_top_prospects(self, limit=10):
-        conn = sqlite3.connect(self.db_path)
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT * FROM prospects 
+            SELECT id, url, organization_name, sustainability_score, donation_probability, engagement_score, final_score
+            FROM prospects 
             ORDER BY final_score DESC 
             LIMIT ?
         ''', (limit,))
@@ -300,19 +292,18 @@ class IntelligentDonorCrawler:
         results = cursor.fetchall()
         conn.close()
         
+        contacts = load_contacts(self.db_path, [row[0] for row in results])
         prospects = []
         for row in results:
             prospect = {
                 'id': row[0],
                 'url': row[1],
                 'organization_name': row[2],
-                'emails': json.loads(row[3]),
-                'phones': json.loads(row[4]),
-                'addresses': json.loads(row[5]),
-                'sustainability_score': row[7],
-                'donation_probability': row[8],
-                'engagement_score': row[9],
-                'final_score': row[10]
+                **contacts[row[0]],
+                'sustainability_score': row[3],
+                'donation_probability': row[4],
+                'engagement_score': row[5],
+                'final_score': row[6]
             }
             prospects.append(prospect)
         
@@ -349,6 +340,7 @@ class IntelligentDonorCrawler:
         return results
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     api_key = "your_openai_api_key_here"
     crawler = IntelligentDonorCrawler(api_key)
     
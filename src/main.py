@@ -13,11 +13,15 @@ try:
 except ImportError:
     print("python-dotenv not installed. Environment variables should be set manually.")
 
+import logging
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.donor_system import donor_bp
+from src.services import DonorServices
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
@@ -44,6 +48,9 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Engines and AI client are created once and shared by every request
+DonorServices().init_app(app).start_background_tasks()
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -86,22 +93,3 @@ if __name__ == '__main__':
     
     app.run(host=host, port=port, debug=debug)
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
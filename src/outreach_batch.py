@@ -0,0 +1,226 @@
+import os
+from datetime import datetime
+
+from src import datastore
+from src.ai_batch import COMPLETED, FAILED, IN_PROGRESS, batch_request_line, get_batch_backend, result_content
+from src.personalized_outreach import (
+    OUTREACH_GENERATION_SETTINGS, STEP_TYPE_PARTS, prospect_from_row, serialize_step_content
+)
+
+class OutreachBatchGenerator:
+    def __init__(self, outreach_engine, db_path=None, backend=None, work_dir=None):
+        self.engine = outreach_engine
+        self.db_path = db_path or outreach_engine.db_path
+        self.backend = backend or get_batch_backend(client=outreach_engine.client)
+        self.work_dir = work_dir or getattr(self.backend, 'work_dir', None) or os.path.join(
+            os.path.dirname(os.path.abspath(self.db_path)), 'batches'
+        )
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.setup_database()
+
+    def setup_database(self):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outreach_batch_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id TEXT,
+                backend TEXT,
+                status TEXT DEFAULT 'in_progress',
+                input_file TEXT,
+                request_count INTEGER,
+                completed_count INTEGER DEFAULT 0,
+                failed_count INTEGER DEFAULT 0,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outreach_batch_items (
+                job_id INTEGER,
+                step_id INTEGER,
+                PRIMARY KEY (job_id, step_id),
+                FOREIGN KEY (job_id) REFERENCES outreach_batch_jobs (id),
+                FOREIGN KEY (step_id) REFERENCES outreach_steps (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_outreach_batch_items_step ON outreach_batch_items (step_id)')
+        conn.commit()
+        conn.close()
+
+    def create_campaigns(self, prospect_ids, sequence_type="standard"):
+        campaign_ids = []
+        for prospect_id in prospect_ids:
+            campaign_id = self.engine.schedule_outreach_campaign(prospect_id, sequence_type, generate_content=False)
+            if campaign_id:
+                campaign_ids.append(campaign_id)
+
+        return {
+            'campaign_ids': campaign_ids,
+            'job': self.submit_pending_steps(campaign_ids) if campaign_ids else None
+        }
+
+    def submit_pending_steps(self, campaign_ids=None):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'outreach_steps'")
+        if not cursor.fetchone():
+            conn.close()
+            return None
+
+        step_types = list(STEP_TYPE_PARTS)
+        query = f'''
+            SELECT os.id, os.step_type, oc.sequence_type, os.step_number, p.*
+            FROM outreach_steps os
+            JOIN outreach_campaigns oc ON os.campaign_id = oc.id
+            JOIN prospects p ON oc.prospect_id = p.id
+            WHERE os.content IS NULL AND os.status = 'pending'
+              AND os.step_type IN ({','.join('?' * len(step_types))})
+              AND os.id NOT IN (
+                  SELECT bi.step_id FROM outreach_batch_items bi
+                  JOIN outreach_batch_jobs bj ON bi.job_id = bj.id
+                  WHERE bj.status = ?
+              )
+        '''
+        params = step_types + [IN_PROGRESS]
+        if campaign_ids:
+            query += f" AND os.campaign_id IN ({','.join('?' * len(campaign_ids))})"
+            params += list(campaign_ids)
+        cursor.execute(query + ' ORDER BY os.id', params)
+        rows = cursor.fetchall()
+
+        if not rows:
+            conn.close()
+            return None
+
+        input_path = os.path.join(self.work_dir, f"outreach_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                part = STEP_TYPE_PARTS[row[1]]
+                prompt = self.engine.build_outreach_prompt(
+                    part, prospect_from_row(row[4:]), self.engine.step_template(row[2], row[3])
+                )
+                body = {
+                    'messages': [{"role": "user", "content": prompt}],
+                    **OUTREACH_GENERATION_SETTINGS[part]
+                }
+                f.write(batch_request_line(f"step-{row[0]}", body) + "\n")
+
+        batch_id = self.backend.submit(input_path)
+
+        cursor.execute('''
+            INSERT INTO outreach_batch_jobs (batch_id, backend, status, input_file, request_count)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (batch_id, self.backend.name, IN_PROGRESS, input_path, len(rows)))
+        job_id = cursor.lastrowid
+        cursor.executemany(
+            'INSERT INTO outreach_batch_items (job_id, step_id) VALUES (?, ?)',
+            [(job_id, row[0]) for row in rows]
+        )
+
+        conn.commit()
+        conn.close()
+
+        return self.get_job(job_id)
+
+    def get_job(self, job_id):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, batch_id, backend, status, input_file, request_count, completed_count,
+                   failed_count, error, created_at, completed_at
+            FROM outreach_batch_jobs WHERE id = ?
+        ''', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+
+        return {
+            'id': row[0],
+            'batch_id': row[1],
+            'backend': row[2],
+            'status': row[3],
+            'input_file': row[4],
+            'request_count': row[5],
+            'completed_count': row[6],
+            'failed_count': row[7],
+            'error': row[8],
+            'created_at': row[9],
+            'completed_at': row[10]
+        }
+
+    def poll_job(self, job_id):
+        job = self.get_job(job_id)
+        if not job or job['status'] != IN_PROGRESS:
+            return job
+
+        batch_status = self.backend.status(job['batch_id'])
+
+        if batch_status['status'] == COMPLETED:
+            self.ingest_results(job_id, job['batch_id'])
+        elif batch_status['status'] == FAILED:
+            # The steps stay empty and are picked up again by the next submission
+            conn = datastore.connect(self.db_path)
+            conn.execute('''
+                UPDATE outreach_batch_jobs SET status = ?, error = ?, completed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (FAILED, batch_status.get('error'), job_id))
+            conn.commit()
+            conn.close()
+
+        return self.get_job(job_id)
+
+    def poll_active_jobs(self):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM outreach_batch_jobs WHERE status = ?', (IN_PROGRESS,))
+        job_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+
+        return [self.poll_job(job_id) for job_id in job_ids]
+
+    def ingest_results(self, job_id, batch_id):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT os.id, os.step_type, p.*
+            FROM outreach_batch_items bi
+            JOIN outreach_steps os ON bi.step_id = os.id
+            JOIN outreach_campaigns oc ON os.campaign_id = oc.id
+            JOIN prospects p ON oc.prospect_id = p.id
+            WHERE bi.job_id = ?
+        ''', (job_id,))
+        steps = {row[0]: (STEP_TYPE_PARTS[row[1]], prospect_from_row(row[2:])) for row in cursor.fetchall()}
+
+        contents = {}
+        for result in self.backend.results(batch_id):
+            custom_id = result.get('custom_id', '')
+            if custom_id.startswith('step-'):
+                contents[int(custom_id[len('step-'):])] = result_content(result)
+
+        updates = []
+        failed = 0
+        for step_id, (part, prospect_data) in steps.items():
+            content = contents.get(step_id)
+            if content is None:
+                failed += 1
+                result = self.engine.get_fallback_outreach_content(part, prospect_data)
+            else:
+                result = self.engine.parse_outreach_content(part, content.strip(), prospect_data)
+            updates.append((serialize_step_content(part, result), step_id))
+
+        cursor.executemany('UPDATE outreach_steps SET content = ? WHERE id = ? AND content IS NULL', updates)
+        cursor.execute('''
+            UPDATE outreach_batch_jobs
+            SET status = ?, completed_count = ?, failed_count = ?, completed_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (COMPLETED, len(updates) - failed, failed, job_id))
+
+        conn.commit()
+        conn.close()
+
+        return len(updates)
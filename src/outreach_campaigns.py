@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from src import datastore
+from src.ai_batch import COMPLETED, FAILED, IN_PROGRESS
+from src.personalized_outreach import OUTREACH_SEQUENCES, STEP_TYPE_PARTS
+
+logger = logging.getLogger(__name__)
+
+# Same score thresholds as AIScoringEngine.get_recommendation, applied to the crawler's final_score
+SCORE_TIERS = [
+    ('HIGH_PRIORITY', 0.8),
+    ('MEDIUM_PRIORITY', 0.6),
+    ('LOW_PRIORITY', 0.4),
+    ('NOT_RECOMMENDED', None)
+]
+
+TIER_SEQUENCES = {
+    'HIGH_PRIORITY': 'high_priority',
+    'MEDIUM_PRIORITY': 'standard',
+    'LOW_PRIORITY': 'low_priority',
+    'NOT_RECOMMENDED': 'low_priority'
+}
+
+def tier_case_sql(column='p.final_score'):
+    branches = ' '.join(
+        f"WHEN {column} >= {threshold} THEN '{tier}'" for tier, threshold in SCORE_TIERS if threshold is not None
+    )
+    return f"CASE {branches} ELSE '{SCORE_TIERS[-1][0]}' END"
+
+class BulkCampaignScheduler:
+    def __init__(self, outreach_engine, chunk_size=None, on_created=None):
+        self.engine = outreach_engine
+        self.db_path = outreach_engine.db_path
+        self.chunk_size = int(chunk_size or os.getenv('OUTREACH_CAMPAIGN_CHUNK_SIZE', 500))
+        self.on_created = on_created
+        self.setup_database()
+
+    def setup_database(self):
+        self.engine.ensure_campaign_tables()
+        conn = datastore.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS outreach_campaign_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT DEFAULT 'in_progress',
+                filter TEXT,
+                total_count INTEGER DEFAULT 0,
+                created_count INTEGER DEFAULT 0,
+                first_campaign_id INTEGER,
+                last_campaign_id INTEGER,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def select_prospects(self, prospect_ids=None, top_n=None, recommendation=None, min_score=None, skip_active=True):
+        if not (prospect_ids or top_n or recommendation or min_score is not None):
+            raise ValueError('Provide prospect_ids, top_n, recommendation or min_score')
+
+        query = f'SELECT p.id, {tier_case_sql()} AS tier FROM prospects p WHERE 1 = 1'
+        params = []
+        if prospect_ids:
+            query += f" AND p.id IN ({','.join('?' * len(prospect_ids))})"
+            params += list(prospect_ids)
+        if recommendation:
+            tiers = [recommendation] if isinstance(recommendation, str) else list(recommendation)
+            query += f" AND tier IN ({','.join('?' * len(tiers))})"
+            params += [tier.upper() for tier in tiers]
+        if min_score is not None:
+            query += ' AND p.final_score >= ?'
+            params.append(float(min_score))
+        if skip_active:
+            query += " AND p.id NOT IN (SELECT prospect_id FROM outreach_campaigns WHERE status = 'active')"
+        query += ' ORDER BY p.final_score DESC, p.id'
+        if top_n:
+            query += ' LIMIT ?'
+            params.append(int(top_n))
+
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        prospects = cursor.fetchall()
+        conn.close()
+
+        return prospects
+
+    def start_job(self, sequence_type=None, **filters):
+        # Without a sequence_type each prospect gets the sequence of its score tier
+        if sequence_type is not None and sequence_type not in OUTREACH_SEQUENCES:
+            raise ValueError(f"sequence_type must be one of: {', '.join(OUTREACH_SEQUENCES)}")
+        prospects = self.select_prospects(**filters)
+
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO outreach_campaign_jobs (status, filter, total_count) VALUES (?, ?, ?)',
+            (IN_PROGRESS, json.dumps({**filters, 'sequence_type': sequence_type}), len(prospects))
+        )
+        job_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        threading.Thread(
+            target=self.run_job,
+            args=(job_id, prospects, sequence_type),
+            name=f'outreach-campaign-job-{job_id}',
+            daemon=True
+        ).start()
+
+        return self.get_job(job_id)
+
+    def run_job(self, job_id, prospects, sequence_type=None):
+        conn = datastore.connect(self.db_path)
+        try:
+            for start in range(0, len(prospects), self.chunk_size):
+                self.create_chunk(conn, job_id, prospects[start:start + self.chunk_size], sequence_type)
+                if self.on_created:
+                    self.on_created()
+            conn.execute(
+                'UPDATE outreach_campaign_jobs SET status = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?',
+                (COMPLETED, job_id)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Bulk campaign job {job_id} failed: {e}")
+            conn.execute(
+                'UPDATE outreach_campaign_jobs SET status = ?, error = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?',
+                (FAILED, str(e), job_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def create_chunk(self, conn, job_id, prospects, sequence_type=None):
+        base_date = datetime.now()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+
+        # Ids are assigned up front under the write lock so the step rows can reference them in one executemany
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'outreach_campaigns'")
+        row = cursor.fetchone()
+        cursor.execute('SELECT MAX(id) FROM outreach_campaigns')
+        next_id = max(row[0] if row else 0, cursor.fetchone()[0] or 0) + 1
+
+        campaigns = []
+        steps = []
+        for offset, (prospect_id, tier) in enumerate(prospects):
+            campaign_id = next_id + offset
+            chosen_sequence = sequence_type or TIER_SEQUENCES[tier]
+            campaigns.append((campaign_id, prospect_id, chosen_sequence))
+            for i, step in enumerate(self.engine.create_outreach_sequence({}, chosen_sequence)):
+                # LLM steps are stored empty and generated when due, like schedule_outreach_campaign
+                content = None if step['type'] in STEP_TYPE_PARTS else f"Execute {step['type']} outreach"
+                scheduled_date = base_date + timedelta(days=step['day'])
+                steps.append((campaign_id, i, step['type'], scheduled_date.date(), content))
+
+        cursor.executemany(
+            'INSERT INTO outreach_campaigns (id, prospect_id, sequence_type) VALUES (?, ?, ?)',
+            campaigns
+        )
+        cursor.executemany('''
+            INSERT INTO outreach_steps (campaign_id, step_number, step_type, scheduled_date, content)
+            VALUES (?, ?, ?, ?, ?)
+        ''', steps)
+        cursor.execute('''
+            UPDATE outreach_campaign_jobs
+            SET created_count = created_count + ?,
+                first_campaign_id = COALESCE(first_campaign_id, ?),
+                last_campaign_id = ?
+            WHERE id = ?
+        ''', (len(campaigns), campaigns[0][0], campaigns[-1][0], job_id))
+        conn.commit()
+
+        return len(campaigns)
+
+    def get_job(self, job_id):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, status, filter, total_count, created_count, first_campaign_id, last_campaign_id,
+                   error, created_at, completed_at
+            FROM outreach_campaign_jobs WHERE id = ?
+        ''', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+
+        return {
+            'id': row[0],
+            'status': row[1],
+            'filter': json.loads(row[2]) if row[2] else {},
+            'total_count': row[3],
+            'created_count': row[4],
+            'progress': round(row[4] / row[3], 4) if row[3] else 1.0,
+            'first_campaign_id': row[5],
+            'last_campaign_id': row[6],
+            'error': row[7],
+            'created_at': row[8],
+            'completed_at': row[9]
+        }
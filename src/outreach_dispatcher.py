@@ -0,0 +1,223 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src import datastore
+from src.outreach_tasks import OutreachTaskQueue
+from src.personalized_outreach import prospect_from_row
+
+logger = logging.getLogger(__name__)
+
+def record_only_handler(steps):
+    # Default channel: the step is marked executed and the actual contact is left to the caller (n8n workflow)
+    return {step['id']: True for step in steps}
+
+def due_timestamp(scheduled_date):
+    return datetime.strptime(str(scheduled_date)[:10], '%Y-%m-%d').timestamp()
+
+class OutreachDispatcher:
+    def __init__(self, outreach_engine, task_queue=None, handlers=None, horizon_days=None, batch_size=None,
+                 refresh_interval=None, retry_delay=None):
+        self.engine = outreach_engine
+        self.db_path = outreach_engine.db_path
+        self.tasks = task_queue or OutreachTaskQueue(outreach_engine)
+        self.handlers = {'email': record_only_handler, 'linkedin': record_only_handler, 'phone': record_only_handler}
+        self.handlers.update(handlers or {})
+        self.horizon_days = float(horizon_days if horizon_days is not None else os.getenv('OUTREACH_DISPATCH_HORIZON_DAYS', 1))
+        self.batch_size = int(batch_size or os.getenv('OUTREACH_DISPATCH_BATCH_SIZE', 100))
+        self.refresh_interval = float(refresh_interval or os.getenv('OUTREACH_DISPATCH_REFRESH_INTERVAL', 60))
+        self.retry_delay = float(retry_delay or os.getenv('OUTREACH_DISPATCH_RETRY_DELAY', 300))
+
+        self._heap = []
+        self._queued = set()
+        self._condition = threading.Condition()
+        self._reload = True
+        self._next_refresh = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.counters = {'loaded': 0, 'executed': 0, 'failed': 0, 'retried': 0, 'batches': 0}
+
+    def register_handler(self, step_type, handler):
+        self.handlers[step_type] = handler
+
+    def load_due_steps(self):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'outreach_steps'")
+        if not cursor.fetchone():
+            conn.close()
+            return 0
+
+        horizon = (datetime.now() + timedelta(days=self.horizon_days)).date()
+        cursor.execute('''
+            SELECT id, scheduled_date FROM outreach_steps
+            WHERE status = 'pending' AND scheduled_date <= ?
+        ''', (horizon,))
+        rows = cursor.fetchall()
+        conn.close()
+
+        loaded = 0
+        with self._condition:
+            for step_id, scheduled_date in rows:
+                if step_id not in self._queued:
+                    heapq.heappush(self._heap, (due_timestamp(scheduled_date), step_id))
+                    self._queued.add(step_id)
+                    loaded += 1
+            self.counters['loaded'] += loaded
+            self._condition.notify()
+
+        return loaded
+
+    def wake(self):
+        # New steps were scheduled: reload on the next loop iteration instead of waiting for the refresh
+        with self._condition:
+            self._reload = True
+            self._condition.notify()
+
+    def pop_due(self, now=None):
+        now = time.time() if now is None else now
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                _, step_id = heapq.heappop(self._heap)
+                self._queued.discard(step_id)
+                due.append(step_id)
+        return due
+
+    def load_steps(self, step_ids):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT os.id, os.campaign_id, os.step_type, os.content, p.*
+            FROM outreach_steps os
+            JOIN outreach_campaigns oc ON os.campaign_id = oc.id
+            JOIN prospects p ON oc.prospect_id = p.id
+            WHERE os.id IN ({','.join('?' * len(step_ids))}) AND os.status = 'pending'
+        ''', list(step_ids))
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [
+            {
+                'id': row[0],
+                'campaign_id': row[1],
+                'step_type': row[2],
+                'content': row[3],
+                'prospect': prospect_from_row(row[4:])
+            }
+            for row in rows
+        ]
+
+    def execute_batch(self, step_ids):
+        if not step_ids:
+            return {}
+
+        # Leased like any other worker's claim: steps held by an API or n8n worker are skipped
+        lease = self.tasks.claim_ids(task_ids=step_ids)
+        if not lease['task_ids']:
+            return {}
+
+        steps = self.load_steps(lease['task_ids'])
+        for step in steps:
+            if step['content'] is None:
+                step['content'] = self.engine.ensure_step_content(step['id'])
+
+        by_type = {}
+        for step in steps:
+            by_type.setdefault(step['step_type'], []).append(step)
+
+        results = {}
+        retry = []
+        for step_type, group in by_type.items():
+            handler = self.handlers.get(step_type, record_only_handler)
+            try:
+                outcome = handler(group)
+            except Exception as e:
+                logger.warning(f"Outreach handler for {step_type} failed on {len(group)} steps: {e}")
+                retry.extend(step['id'] for step in group)
+                continue
+            for step in group:
+                results[step['id']] = bool(outcome.get(step['id'], False))
+
+        self.tasks.complete(
+            lease['lease_id'],
+            [{'id': step_id, 'status': 'executed' if ok else 'failed'} for step_id, ok in results.items()]
+        )
+        if retry:
+            self.tasks.release(lease['lease_id'], retry)
+            self.requeue(retry, time.time() + self.retry_delay)
+
+        with self._condition:
+            self.counters['batches'] += 1
+            self.counters['executed'] += sum(results.values())
+            self.counters['failed'] += len(results) - sum(results.values())
+            self.counters['retried'] += len(retry)
+
+        return results
+
+    def requeue(self, step_ids, due_at):
+        with self._condition:
+            for step_id in step_ids:
+                if step_id not in self._queued:
+                    heapq.heappush(self._heap, (due_at, step_id))
+                    self._queued.add(step_id)
+            self._condition.notify()
+
+    def run_once(self):
+        executed = 0
+        while True:
+            step_ids = self.pop_due()
+            if not step_ids:
+                return executed
+            executed += len(self.execute_batch(step_ids))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._reload or time.time() >= self._next_refresh:
+                    self._reload = False
+                    self._next_refresh = time.time() + self.refresh_interval
+                    self.load_due_steps()
+                executed = self.run_once()
+                if executed:
+                    logger.info(f"Dispatched {executed} outreach steps")
+            except Exception as e:
+                logger.error(f"Outreach dispatch failed: {e}")
+
+            with self._condition:
+                if self._stop.is_set() or self._reload:
+                    continue
+                # Sleep until the earliest step is due or the next refresh, whichever comes first
+                wake_at = self._next_refresh
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                self._condition.wait(max(0, wake_at - time.time()))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='outreach-dispatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        with self._condition:
+            next_due = self._heap[0][0] if self._heap else None
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'queued': len(self._heap),
+                'next_due': datetime.fromtimestamp(next_due).isoformat() if next_due else None,
+                'handlers': sorted(self.handlers),
+                **self.counters
+            }
@@ -0,0 +1,82 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from src import datastore
+
+logger = logging.getLogger(__name__)
+
+class OutreachContentPrefetcher:
+    def __init__(self, outreach_engine, lead_time_days=None, interval=None, batch_size=None):
+        self.engine = outreach_engine
+        self.db_path = outreach_engine.db_path
+        self.lead_time_days = float(lead_time_days if lead_time_days is not None else os.getenv('OUTREACH_PREFETCH_LEAD_DAYS', 1))
+        self.interval = float(interval or os.getenv('OUTREACH_PREFETCH_INTERVAL', 300))
+        self.batch_size = int(batch_size or os.getenv('OUTREACH_PREFETCH_BATCH_SIZE', 50))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due_steps(self):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in cursor.fetchall()}
+        if 'outreach_steps' not in tables:
+            conn.close()
+            return []
+
+        target_date = (datetime.now() + timedelta(days=self.lead_time_days)).date()
+        query = '''
+            SELECT os.id FROM outreach_steps os
+            WHERE os.content IS NULL AND os.status = 'pending' AND os.scheduled_date <= ?
+        '''
+        # Steps already submitted in a running batch job are left to that job
+        if 'outreach_batch_jobs' in tables:
+            query += '''
+              AND os.id NOT IN (
+                  SELECT bi.step_id FROM outreach_batch_items bi
+                  JOIN outreach_batch_jobs bj ON bi.job_id = bj.id
+                  WHERE bj.status = 'in_progress'
+              )
+            '''
+        cursor.execute(query + ' ORDER BY os.scheduled_date, os.id LIMIT ?', (target_date, self.batch_size))
+        step_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+
+        return step_ids
+
+    def run_once(self):
+        generated = 0
+        for step_id in self.due_steps():
+            if self._stop.is_set():
+                break
+            try:
+                if self.engine.ensure_step_content(step_id) is not None:
+                    generated += 1
+            except Exception as e:
+                logger.warning(f"Error prefetching content for outreach step {step_id}: {e}")
+        return generated
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                generated = self.run_once()
+                if generated:
+                    logger.info(f"Prefetched content for {generated} outreach steps")
+            except Exception as e:
+                logger.error(f"Outreach prefetch failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='outreach-prefetch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
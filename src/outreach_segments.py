@@ -0,0 +1,210 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from src import datastore
+from src.personalized_outreach import OUTREACH_GENERATION_SETTINGS, prospect_from_row
+
+FOCUS_AREAS = ['sustainability', 'environmental', 'climate', 'green', 'eco']
+
+# Topics an email must share with the prospect's own page to pass the quality gate
+TOPIC_KEYWORDS = [
+    'sustainability', 'sustainable', 'environment', 'environmental', 'climate', 'carbon', 'renewable',
+    'energy', 'conservation', 'biodiversity', 'ocean', 'marine', 'beach', 'coastal', 'plastic',
+    'pollution', 'waste', 'recycling', 'circular', 'water', 'wildlife', 'education', 'community',
+    'technology', 'innovation', 'research', 'drone', 'csr', 'foundation', 'grant'
+]
+
+SEGMENT_REFINEMENT_SETTINGS = {'model': 'gpt-3.5-turbo', 'max_tokens': 400, 'temperature': 0.5}
+
+class OutreachSegmenter:
+    def __init__(self, outreach_engine, scoring_engine, n_segments=None, min_personalization_score=None):
+        self.outreach = outreach_engine
+        self.scoring = scoring_engine
+        self.db_path = outreach_engine.db_path
+        self.n_segments = int(n_segments or os.getenv('OUTREACH_SEGMENTS', 5))
+        self.min_personalization_score = float(
+            min_personalization_score or os.getenv('OUTREACH_MIN_PERSONALIZATION_SCORE', 0.7)
+        )
+
+    def load_prospects(self, prospect_ids=None):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        if prospect_ids:
+            cursor.execute(
+                f"SELECT * FROM prospects WHERE id IN ({','.join('?' * len(prospect_ids))})",
+                list(prospect_ids)
+            )
+        else:
+            cursor.execute('SELECT * FROM prospects')
+        prospects = [prospect_from_row(row) for row in cursor.fetchall()]
+        conn.close()
+        return prospects
+
+    def feature_matrix(self, prospects):
+        features = pd.DataFrame([self.scoring.extract_advanced_features(p) for p in prospects]).fillna(0)
+        # Keyword counts and text lengths are heavy-tailed; log scaling keeps one long page from owning a cluster
+        return StandardScaler().fit_transform(np.log1p(features.clip(lower=0)))
+
+    def segment(self, prospects):
+        n_clusters = max(1, min(self.n_segments, len(prospects)))
+        X = self.feature_matrix(prospects)
+        kmeans = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
+        labels = kmeans.fit_predict(X)
+        distances = np.linalg.norm(X - kmeans.cluster_centers_[labels], axis=1)
+
+        segments = {}
+        for index, label in enumerate(labels):
+            segments.setdefault(int(label), []).append(index)
+
+        return [
+            {
+                'segment': label,
+                'prospects': [prospects[i] for i in members],
+                # Exemplars closest to the centroid describe the segment in the template prompt
+                'exemplars': [prospects[i] for i in sorted(members, key=lambda i: distances[i])[:3]]
+            }
+            for label, members in sorted(segments.items())
+        ]
+
+    def build_template_prompt(self, exemplars):
+        examples = "\n".join(
+            f"- {p.get('organization_name', 'Organization')}: {(p.get('content_text') or '')[:300]}"
+            for p in exemplars
+        )
+
+        return f"""
+        Write an outreach email template for Second Life NGO, to be sent to organizations similar to these:
+        {examples}
+
+        About Second Life NGO:
+        - Uses AI-powered drone technology to identify and map plastic pollution on beaches
+        - Converts waste data into actionable insights for cleanup operations
+        - Partners with organizations for environmental impact and CSR initiatives
+
+        Template requirements:
+        - Use the placeholder {{organization_name}} wherever the organization is named
+        - Use the placeholder {{focus_area}} once for the organization's main focus (e.g. sustainability, climate)
+        - Professional but warm tone, clear call-to-action, under 200 words
+
+        Format as:
+        SUBJECT: [subject line]
+        BODY: [email body]
+        """
+
+    def generate_segment_template(self, exemplars):
+        try:
+            response = self.outreach.client.chat.completions.create(
+                messages=[{"role": "user", "content": self.build_template_prompt(exemplars)}],
+                call_site='generate_segment_template',
+                **OUTREACH_GENERATION_SETTINGS['email']
+            )
+            return response.choices[0].message.content.strip()
+        except Exception:
+            return None
+
+    def focus_area(self, prospect_data):
+        content = (prospect_data.get('content_text') or '').lower()
+        for keyword in FOCUS_AREAS:
+            if keyword in content:
+                return keyword
+        return 'sustainability'
+
+    def render_template(self, template, prospect_data):
+        filled = template.replace('{organization_name}', prospect_data.get('organization_name') or 'your organization')
+        filled = filled.replace('{focus_area}', self.focus_area(prospect_data))
+        return self.outreach.parse_email_content(filled, prospect_data)
+
+    def refine_email(self, email, prospect_data):
+        prompt = f"""
+        Lightly personalize this outreach email for {prospect_data.get('organization_name', 'Organization')}.
+        Organization insight: {(prospect_data.get('content_text') or '')[:500]}
+        Keep the structure and length; mention the organization by name and its environmental focus.
+
+        SUBJECT: {email['subject']}
+        BODY: {email['body']}
+
+        Format as:
+        SUBJECT: [subject line]
+        BODY: [email body]
+        """
+        try:
+            response = self.outreach.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                call_site='refine_segment_email',
+                **SEGMENT_REFINEMENT_SETTINGS
+            )
+            return self.outreach.parse_email_content(response.choices[0].message.content.strip(), prospect_data)
+        except Exception:
+            return None
+
+    def topics(self, text):
+        text = (text or '').lower()
+        return {keyword for keyword in TOPIC_KEYWORDS if re.search(rf'\b{keyword}\b', text)}
+
+    def fit_score(self, email, prospect_data, written_text):
+        # The substituted name and focus area always match: topics only count when the model wrote them
+        score = 0.4
+        organization_name = (prospect_data.get('organization_name') or '').lower()
+        if organization_name and organization_name in email['body'].lower():
+            score += 0.2
+        score += 0.2 * len(self.topics(prospect_data.get('content_text')) & self.topics(written_text))
+        return min(score, 1.0)
+
+    def personalize(self, template, prospect_data):
+        if template:
+            email = self.render_template(template, prospect_data)
+            written = re.sub(r'\{(organization_name|focus_area)\}', ' ', template)
+            fit_score = self.fit_score(email, prospect_data, written)
+            if fit_score >= self.min_personalization_score:
+                return {**email, 'fit_score': fit_score, 'source': 'segment_template'}
+
+            refined = self.refine_email(email, prospect_data)
+            if refined:
+                fit_score = self.fit_score(refined, prospect_data, f"{refined['subject']} {refined['body']}")
+                if fit_score >= self.min_personalization_score:
+                    return {**refined, 'fit_score': fit_score, 'source': 'segment_refined'}
+
+        # Below the quality gate: fall back to a full per-prospect generation
+        return {**self.outreach.generate_personalized_email(prospect_data, {}), 'source': 'individual'}
+
+    def generate_segment_emails(self, prospect_ids=None):
+        prospects = self.load_prospects(prospect_ids)
+        if not prospects:
+            return {'segments': [], 'emails': {}, 'stats': {'prospects': 0}}
+
+        executor = self.outreach.generation_executor
+        segmented = self.segment(prospects)
+        templates = list(executor.map(lambda segment: self.generate_segment_template(segment['exemplars']), segmented))
+
+        # Refinements and individual fallbacks are separate LLM calls: run them side by side
+        futures = {}
+        segments = []
+        for segment, template in zip(segmented, templates):
+            for prospect_data in segment['prospects']:
+                futures[prospect_data['id']] = (segment['segment'], executor.submit(self.personalize, template, prospect_data))
+            segments.append({
+                'segment': segment['segment'],
+                'size': len(segment['prospects']),
+                'exemplars': [p['organization_name'] for p in segment['exemplars']],
+                'template': template
+            })
+        emails = {
+            prospect_id: {**future.result(), 'segment': label}
+            for prospect_id, (label, future) in futures.items()
+        }
+
+        sources = [email['source'] for email in emails.values()]
+        return {
+            'segments': segments,
+            'emails': emails,
+            'stats': {
+                'prospects': len(prospects),
+                'segments': len(segments),
+                'segment_template': sources.count('segment_template'),
+                'segment_refined': sources.count('segment_refined'),
+                'individual': sources.count('individual')
+            }
+        }
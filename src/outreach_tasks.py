@@ -0,0 +1,168 @@
+import os
+import time
+import uuid
+from datetime import datetime
+
+from src import datastore
+from src.prospect_contacts import load_contacts
+
+LEASE_COLUMNS = {
+    'lease_id': 'TEXT',
+    'lease_expires_at': 'REAL'
+}
+
+COMPLETION_STATUSES = ('executed', 'failed')
+
+class OutreachTaskQueue:
+    def __init__(self, outreach_engine, lease_seconds=None, max_claim=None, max_generate=None):
+        self.engine = outreach_engine
+        self.db_path = outreach_engine.db_path
+        self.lease_seconds = float(lease_seconds or os.getenv('OUTREACH_LEASE_SECONDS', 300))
+        self.max_claim = int(max_claim or os.getenv('OUTREACH_MAX_CLAIM', 1000))
+        self.max_generate = int(max_generate or os.getenv('OUTREACH_CLAIM_MAX_GENERATE', 20))
+        self.setup_database()
+
+    def setup_database(self):
+        self.engine.ensure_campaign_tables()
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA table_info(outreach_steps)')
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in LEASE_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE outreach_steps ADD COLUMN {column} {column_type}')
+        conn.commit()
+        conn.close()
+
+    def claim_ids(self, limit=None, task_ids=None, step_types=None, lease_seconds=None):
+        limit = max(1, min(int(limit or self.max_claim), self.max_claim))
+        now = time.time()
+        expires_at = now + float(lease_seconds or self.lease_seconds)
+        lease_id = uuid.uuid4().hex
+
+        # The write lock is taken before selecting, so two workers can never pick the same free steps
+        with datastore.transaction(self.db_path, immediate=True) as conn:
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT id FROM outreach_steps
+                WHERE status = 'pending' AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+            '''
+            params = [now]
+            if task_ids:
+                query += f" AND id IN ({','.join('?' * len(task_ids))})"
+                params += list(task_ids)
+            else:
+                query += ' AND scheduled_date <= ?'
+                params.append(datetime.now().date())
+            if step_types:
+                query += f" AND step_type IN ({','.join('?' * len(step_types))})"
+                params += list(step_types)
+            cursor.execute(query + ' ORDER BY scheduled_date, id LIMIT ?', params + [limit])
+            claimed = [row[0] for row in cursor.fetchall()]
+
+            cursor.executemany(
+                'UPDATE outreach_steps SET lease_id = ?, lease_expires_at = ? WHERE id = ?',
+                [(lease_id, expires_at, step_id) for step_id in claimed]
+            )
+
+        return {'lease_id': lease_id, 'lease_expires_at': expires_at, 'task_ids': claimed}
+
+    def claim(self, limit=None, task_ids=None, step_types=None, lease_seconds=None):
+        lease = self.claim_ids(limit, task_ids, step_types, lease_seconds)
+        if not lease['task_ids']:
+            return {**lease, 'tasks': [], 'deferred': 0}
+
+        # Content is generated just in time, inside the request while the lease runs: only the first
+        # max_generate steps without content are generated, the others go back to the queue below
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id FROM outreach_steps
+            WHERE id IN ({','.join('?' * len(lease['task_ids']))}) AND content IS NULL
+            ORDER BY scheduled_date, id
+        ''', lease['task_ids'])
+        missing = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        list(self.engine.generation_executor.map(self.engine.ensure_step_content, missing[:self.max_generate]))
+
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT os.id, os.campaign_id, os.step_number, os.step_type, os.scheduled_date, os.content,
+                   oc.prospect_id, p.organization_name
+            FROM outreach_steps os
+            JOIN outreach_campaigns oc ON os.campaign_id = oc.id
+            JOIN prospects p ON oc.prospect_id = p.id
+            WHERE os.id IN ({','.join('?' * len(lease['task_ids']))}) AND os.lease_id = ?
+            ORDER BY os.scheduled_date, os.id
+        ''', lease['task_ids'] + [lease['lease_id']])
+        rows = cursor.fetchall()
+        conn.close()
+
+        deferred = [row[0] for row in rows if row[5] is None]
+        if deferred:
+            self.release(lease['lease_id'], deferred)
+            rows = [row for row in rows if row[5] is not None]
+        lease = {**lease, 'task_ids': [row[0] for row in rows], 'deferred': len(deferred)}
+        contacts = load_contacts(self.db_path, {row[6] for row in rows})
+
+        tasks = [
+            {
+                'id': row[0],
+                'campaign_id': row[1],
+                'step_number': row[2],
+                'step_type': row[3],
+                'scheduled_date': row[4],
+                'content': row[5],
+                'prospect_id': row[6],
+                'organization_name': row[7],
+                'emails': contacts[row[6]]['emails'],
+                'phones': contacts[row[6]]['phones']
+            }
+            for row in rows
+        ]
+        return {**lease, 'tasks': tasks}
+
+    def complete(self, lease_id, results):
+        updates = []
+        for result in results:
+            if not isinstance(result, dict):
+                raise ValueError('each result must be an object with an id')
+            status = result.get('status', 'executed')
+            if status not in COMPLETION_STATUSES:
+                raise ValueError(f"status must be one of {', '.join(COMPLETION_STATUSES)}")
+            updates.append((status, int(result['id']), lease_id))
+
+        # A step whose lease expired and was claimed again belongs to the new holder: its update matches no row
+        with datastore.transaction(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE outreach_steps
+                SET status = ?, executed_at = CURRENT_TIMESTAMP, lease_id = NULL, lease_expires_at = NULL
+                WHERE id = ? AND lease_id = ? AND status = 'pending'
+            ''', updates)
+            completed = cursor.rowcount
+
+        return {'completed': completed, 'rejected': len(updates) - completed}
+
+    def release(self, lease_id, task_ids=None):
+        query = 'UPDATE outreach_steps SET lease_id = NULL, lease_expires_at = NULL WHERE lease_id = ?'
+        params = [lease_id]
+        if task_ids:
+            query += f" AND id IN ({','.join('?' * len(task_ids))})"
+            params += list(task_ids)
+
+        with datastore.transaction(self.db_path) as conn:
+            released = conn.execute(query, params).rowcount
+
+        return released
+
+    def execute(self, task_ids):
+        lease = self.claim_ids(task_ids=task_ids)
+        if not lease['task_ids']:
+            return {'completed': 0, 'rejected': 0, 'skipped': len(task_ids)}
+
+        list(self.engine.generation_executor.map(self.engine.ensure_step_content, lease['task_ids']))
+        result = self.complete(lease['lease_id'], [{'id': step_id, 'status': 'executed'} for step_id in lease['task_ids']])
+        return {**result, 'skipped': len(task_ids) - len(lease['task_ids'])}
@@ -1,25 +1,109 @@
-import openai
-import sqlite3
+from src.ai_client import AIClient, provider_api_key
+from src import datastore
+import os
 import json
+import hashlib
+import base64
+import threading
+import queue
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from src.ai_singleflight import SingleFlight
+
+OUTREACH_GENERATION_SETTINGS = {
+    'email': {'model': 'gpt-4', 'max_tokens': 400, 'temperature': 0.7},
+    'social_media': {'model': 'gpt-3.5-turbo', 'max_tokens': 500, 'temperature': 0.7},
+    'call_script': {'model': 'gpt-3.5-turbo', 'max_tokens': 600, 'temperature': 0.6}
+}
+
+OUTREACH_PARTS = ('email', 'social_media', 'call_script')
+
+# Bump when prompts or generation settings change: stored artifacts from older prompts are ignored
+PROMPT_VERSION = '1'
+
+STEP_TYPE_PARTS = {'email': 'email', 'linkedin': 'social_media', 'phone': 'call_script'}
+
+OUTREACH_SEQUENCES = {
+    "standard": [
+        {"day": 0, "type": "email", "template": "initial_outreach"},
+        {"day": 7, "type": "linkedin", "template": "connection_request"},
+        {"day": 14, "type": "email", "template": "follow_up"},
+        {"day": 21, "type": "linkedin", "template": "value_add_post"},
+        {"day": 30, "type": "email", "template": "final_follow_up"}
+    ],
+    "high_priority": [
+        {"day": 0, "type": "email", "template": "initial_outreach"},
+        {"day": 3, "type": "linkedin", "template": "connection_request"},
+        {"day": 7, "type": "email", "template": "follow_up"},
+        {"day": 10, "type": "phone", "template": "call_script"},
+        {"day": 14, "type": "linkedin", "template": "value_add_post"},
+        {"day": 21, "type": "email", "template": "partnership_proposal"}
+    ],
+    "low_priority": [
+        {"day": 0, "type": "email", "template": "initial_outreach"},
+        {"day": 14, "type": "linkedin", "template": "connection_request"},
+        {"day": 30, "type": "email", "template": "follow_up"}
+    ]
+}
+
+def serialize_step_content(part, result):
+    return result if part == 'call_script' else json.dumps(result)
+
+def prospect_content_hash(prospect_data):
+    payload = json.dumps(
+        {key: prospect_data.get(key) for key in ('url', 'organization_name', 'content_text', 'sustainability_score')},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def encode_task_cursor(task):
+    return base64.urlsafe_b64encode(f"{task[4]}|{task[0]}".encode()).decode()
+
+def decode_task_cursor(cursor):
+    scheduled_date, step_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return scheduled_date, int(step_id)
+
+def prospect_from_row(prospect_row):
+    return {
+        'id': prospect_row[0],
+        'url': prospect_row[1],
+        'organization_name': prospect_row[2],
+        'emails': json.loads(prospect_row[3]),
+        'phones': json.loads(prospect_row[4]),
+        'content_text': prospect_row[6],
+        'sustainability_score': prospect_row[7],
+        'final_score': prospect_row[10]
+    }
 
 class PersonalizedOutreachEngine:
-    def __init__(self, api_key, db_path="donor_prospects.db"):
+    def __init__(self, api_key, db_path="donor_prospects.db", client=None):
         self.api_key = api_key
         self.db_path = db_path
-        self.client = openai.OpenAI(api_key=api_key)
-        
-    def generate_personalized_email(self, prospect_data, campaign_info):
+        self.client = client or AIClient(api_key=provider_api_key(api_key))
+        self.step_content_flight = SingleFlight()
+        self.generation_timeout = float(os.getenv('OUTREACH_GENERATION_TIMEOUT', 30))
+        self.generation_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('OUTREACH_GENERATION_WORKERS', 12)),
+            thread_name_prefix='outreach-generation'
+        )
+        self.setup_lock = threading.Lock()
+        self.campaign_tables_ready = False
+        self.artifact_store_ready = False
+    
+    def build_email_prompt(self, prospect_data, template=None):
         organization_name = prospect_data.get('organization_name', 'Organization')
         sustainability_score = prospect_data.get('sustainability_score', 0)
         content_sample = prospect_data.get('content_text', '')[:500]
+        # Follow-ups of a sequence must not repeat the initial email
+        sequence_step = f"""
+        Sequence step: {template.replace('_', ' ')}
+        - Write this message for that step only, without repeating earlier emails of the sequence
+        """ if template else ""
         
-        prompt = f"""
+        return f"""
         Write a personalized email to {organization_name} for Second Life NGO.
         
         About Second Life NGO:
@@ -39,35 +123,39 @@ class PersonalizedOutreachEngine:
         - Include clear call-to-action
         - Keep under 200 words
         - Subject line and body
-        
+        {sequence_step}
         Format as:
         SUBJECT: [subject line]
         BODY: [email body]
         """
+    
+    def parse_email_content(self, email_content, prospect_data):
+        if "SUBJECT:" in email_content and "BODY:" in email_content:
+            parts = email_content.split("BODY:")
+            subject = parts[0].replace("SUBJECT:", "").strip()
+            body = parts[1].strip()
+        else:
+            subject = f"Partnership Opportunity: AI-Powered Beach Cleanup Initiative"
+            body = email_content
+        
+        return {
+            'subject': subject,
+            'body': body,
+            'personalization_score': self.calculate_personalization_score(body, prospect_data)
+        }
+    
+    def generate_personalized_email(self, prospect_data, campaign_info, fresh=False):
+        organization_name = prospect_data.get('organization_name', 'Organization')
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=400,
-                temperature=0.7
+                messages=[{"role": "user", "content": self.build_email_prompt(prospect_data, campaign_info.get('template'))}],
+                call_site='generate_personalized_email',
+                cache=not fresh,
+                **OUTREACH_GENERATION_SETTINGS['email']
             )
             
-            email_content = response.choices[0].message.content.strip()
-            
-            if "SUBJECT:" in email_content and "BODY:" in email_content:
-                parts = email_content.split("BODY:")
-                subject = parts[0].replace("SUBJECT:", "").strip()
-                body = parts[1].strip()
-            else:
-                subject = f"Partnership Opportunity: AI-Powered Beach Cleanup Initiative"
-                body = email_content
-            
-            return {
-                'subject': subject,
-                'body': body,
-                'personalization_score': self.calculate_personalization_score(body, prospect_data)
-            }
+            return self.parse_email_content(response.choices[0].message.content.strip(), prospect_data)
             
         except Exception as e:
             return self.get_fallback_email(organization_name)
@@ -104,10 +192,10 @@ Second Life NGO Partnership Team""",
         
         return min(score, 1.0)
     
-    def generate_social_media_content(self, prospect_data):
+    def build_social_media_prompt(self, prospect_data):
         organization_name = prospect_data.get('organization_name', 'Organization')
         
-        prompt = f"""
+        return f"""
         Create social media content to engage {organization_name} about Second Life NGO's AI beach cleanup technology.
         
         Generate:
@@ -125,63 +213,51 @@ Second Life NGO Partnership Team""",
         TWITTER: [tweet]
         LINKEDIN_POST: [post]
         """
+    
+    def parse_social_media_content(self, content):
+        social_content = {}
+        for platform in ['LINKEDIN_MESSAGE', 'TWITTER', 'LINKEDIN_POST']:
+            if platform in content:
+                start = content.find(platform + ":") + len(platform + ":")
+                end = content.find("\n" + platform.split("_")[0], start) if "_" in platform else len(content)
+                social_content[platform.lower()] = content[start:end].strip()
+        
+        return social_content
+    
+    def get_fallback_social_media_content(self, organization_name):
+        return {
+            'linkedin_message': f"Hi! I'd love to connect and share how Second Life NGO's AI technology is revolutionizing beach cleanup. Interested in environmental partnerships?",
+            'twitter': f"@{organization_name.replace(' ', '')} Check out how AI drones are transforming beach cleanup! Partnership opportunities available. #AI #Sustainability",
+            'linkedin_post': f"Excited to see organizations like {organization_name} leading in sustainability! At Second Life NGO, we're using AI-powered drones to map beach pollution and make cleanup 300% more efficient. Would love to explore collaboration opportunities!"
+        }
+    
+    def generate_social_media_content(self, prospect_data, fresh=False):
+        organization_name = prospect_data.get('organization_name', 'Organization')
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
-                temperature=0.7
+                messages=[{"role": "user", "content": self.build_social_media_prompt(prospect_data)}],
+                call_site='generate_social_media_content',
+                cache=not fresh,
+                **OUTREACH_GENERATION_SETTINGS['social_media']
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            social_content = {}
-            for platform in ['LINKEDIN_MESSAGE', 'TWITTER', 'LINKEDIN_POST']:
-                if platform in content:
-                    start = content.find(platform + ":") + len(platform + ":")
-                    end = content.find("\n" + platform.split("_")[0], start) if "_" in platform else len(content)
-                    social_content[platform.lower()] = content[start:end].strip()
-            
-            return social_content
+            return self.parse_social_media_content(response.choices[0].message.content.strip())
             
         except Exception as e:
-            return {
-                'linkedin_message': f"Hi! I'd love to connect and share how Second Life NGO's AI technology is revolutionizing beach cleanup. Interested in environmental partnerships?",
-                'twitter': f"@{organization_name.replace(' ', '')} Check out how AI drones are transforming beach cleanup! Partnership opportunities available. #AI #Sustainability",
-                'linkedin_post': f"Excited to see organizations like {organization_name} leading in sustainability! At Second Life NGO, we're using AI-powered drones to map beach pollution and make cleanup 300% more efficient. Would love to explore collaboration opportunities!"
-            }
+            return self.get_fallback_social_media_content(organization_name)
     
     def create_outreach_sequence(self, prospect_data, sequence_type="standard"):
-        sequences = {
-            "standard": [
-                {"day": 0, "type": "email", "template": "initial_outreach"},
-                {"day": 7, "type": "linkedin", "template": "connection_request"},
-                {"day": 14, "type": "email", "template": "follow_up"},
-                {"day": 21, "type": "linkedin", "template": "value_add_post"},
-                {"day": 30, "type": "email", "template": "final_follow_up"}
-            ],
-            "high_priority": [
-                {"day": 0, "type": "email", "template": "initial_outreach"},
-                {"day": 3, "type": "linkedin", "template": "connection_request"},
-                {"day": 7, "type": "email", "template": "follow_up"},
-                {"day": 10, "type": "phone", "template": "call_script"},
-                {"day": 14, "type": "linkedin", "template": "value_add_post"},
-                {"day": 21, "type": "email", "template": "partnership_proposal"}
-            ],
-            "low_priority": [
-                {"day": 0, "type": "email", "template": "initial_outreach"},
-                {"day": 14, "type": "linkedin", "template": "connection_request"},
-                {"day": 30, "type": "email", "template": "follow_up"}
-            ]
-        }
-        
-        return sequences.get(sequence_type, sequences["standard"])
+        return OUTREACH_SEQUENCES.get(sequence_type, OUTREACH_SEQUENCES["standard"])
+    
+    def step_template(self, sequence_type, step_number):
+        sequence = self.create_outreach_sequence({}, sequence_type)
+        return sequence[step_number]['template'] if 0 <= step_number < len(sequence) else None
     
-    def generate_call_script(self, prospect_data):
+    def build_call_script_prompt(self, prospect_data):
         organization_name = prospect_data.get('organization_name', 'Organization')
         
-        prompt = f"""
+        return f"""
         Create a phone call script for reaching out to {organization_name} about Second Life NGO partnership.
         
         Include:
@@ -193,30 +269,372 @@ Second Life NGO Partnership Team""",
         
         Keep professional but conversational.
         """
+    
+    def get_fallback_call_script(self, organization_name):
+        return f"""
+            OPENING: "Hi, this is [Name] from Second Life NGO. I'm calling because I noticed {organization_name}'s commitment to sustainability and thought you'd be interested in our AI-powered beach cleanup technology."
+            
+            VALUE PROP: "We use drones and AI to map plastic pollution on beaches, making cleanup efforts 300% more efficient. We're looking for partners who share our environmental mission."
+            
+            ENGAGEMENT: "Does environmental technology innovation align with your current initiatives?"
+            
+            NEXT STEPS: "Could we schedule a brief 15-minute call to explore potential collaboration?"
+            """
+    
+    def generate_call_script(self, prospect_data, fresh=False):
+        organization_name = prospect_data.get('organization_name', 'Organization')
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=600,
-                temperature=0.6
+                messages=[{"role": "user", "content": self.build_call_script_prompt(prospect_data)}],
+                call_site='generate_call_script',
+                cache=not fresh,
+                **OUTREACH_GENERATION_SETTINGS['call_script']
             )
             
             return response.choices[0].message.content.strip()
             
         except Exception as e:
-            return f"""
-            OPENING: "Hi, this is [Name] from Second Life NGO. I'm calling because I noticed {organization_name}'s commitment to sustainability and thought you'd be interested in our AI-powered beach cleanup technology."
+            return self.get_fallback_call_script(organization_name)
+    
+    def build_outreach_prompt(self, part, prospect_data, template=None):
+        if part == 'email':
+            return self.build_email_prompt(prospect_data, template)
+        elif part == 'social_media':
+            return self.build_social_media_prompt(prospect_data)
+        elif part == 'call_script':
+            return self.build_call_script_prompt(prospect_data)
+        raise ValueError(f"Unknown outreach part: {part}")
+    
+    def parse_outreach_content(self, part, content, prospect_data):
+        if part == 'email':
+            return self.parse_email_content(content, prospect_data)
+        elif part == 'social_media':
+            return self.parse_social_media_content(content)
+        return content
+    
+    def get_fallback_outreach_content(self, part, prospect_data):
+        organization_name = prospect_data.get('organization_name', 'Organization')
+        if part == 'email':
+            return self.get_fallback_email(organization_name)
+        elif part == 'social_media':
+            return self.get_fallback_social_media_content(organization_name)
+        return self.get_fallback_call_script(organization_name)
+    
+    def generate_outreach_bundle(self, prospect_data, campaign_info=None, timeout=None, parts=OUTREACH_PARTS, fresh=False):
+        timeout = self.generation_timeout if timeout is None else timeout
+        generators = {
+            'email': lambda: self.generate_personalized_email(prospect_data, campaign_info or {}, fresh),
+            'social_media': lambda: self.generate_social_media_content(prospect_data, fresh),
+            'call_script': lambda: self.generate_call_script(prospect_data, fresh)
+        }
+        futures = {part: self.generation_executor.submit(generators[part]) for part in parts}
+        
+        # The generations share one deadline: the bundle takes as long as the slowest part
+        done, _ = wait(futures.values(), timeout=timeout)
+        
+        bundle = {'timed_out': []}
+        for part, future in futures.items():
+            if future in done:
+                bundle[part] = future.result()
+            else:
+                future.cancel()
+                bundle[part] = self.get_fallback_outreach_content(part, prospect_data)
+                bundle['timed_out'].append(part)
+        
+        return bundle
+    
+    def ensure_artifact_store(self):
+        if self.artifact_store_ready:
+            return
+        with self.setup_lock:
+            if self.artifact_store_ready:
+                return
+            conn = datastore.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outreach_artifacts (
+                    prospect_id INTEGER,
+                    part TEXT,
+                    content_hash TEXT,
+                    prompt_version TEXT,
+                    content TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (prospect_id, part)
+                )
+            ''')
+            # A re-crawl goes through INSERT OR REPLACE on the prospect url, which does not fire
+            # delete triggers: drop the old artifacts before the row is replaced
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS outreach_artifacts_recrawl
+                BEFORE INSERT ON prospects
+                BEGIN
+                    DELETE FROM outreach_artifacts
+                    WHERE prospect_id IN (SELECT id FROM prospects WHERE url = NEW.url);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS outreach_artifacts_update
+                AFTER UPDATE OF url, organization_name, content_text, sustainability_score ON prospects
+                BEGIN
+                    DELETE FROM outreach_artifacts WHERE prospect_id = OLD.id;
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS outreach_artifacts_delete
+                AFTER DELETE ON prospects
+                BEGIN
+                    DELETE FROM outreach_artifacts WHERE prospect_id = OLD.id;
+                END
+            ''')
+            conn.commit()
+            conn.close()
+            self.artifact_store_ready = True
+    
+    def load_outreach_artifacts(self, prospect_data):
+        self.ensure_artifact_store()
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT part, content FROM outreach_artifacts
+            WHERE prospect_id = ? AND content_hash = ? AND prompt_version = ?
+        ''', (prospect_data.get('id'), prospect_content_hash(prospect_data), PROMPT_VERSION))
+        artifacts = {part: json.loads(content) for part, content in cursor.fetchall()}
+        conn.close()
+        return artifacts
+    
+    def store_outreach_artifacts(self, prospect_data, artifacts):
+        # Fallback content is never stored, so the next view retries the generation
+        rows = [
+            (prospect_data.get('id'), part, prospect_content_hash(prospect_data), PROMPT_VERSION, json.dumps(result))
+            for part, result in artifacts.items()
+            if result != self.get_fallback_outreach_content(part, prospect_data)
+        ]
+        if prospect_data.get('id') is None or not rows:
+            return 0
+        
+        self.ensure_artifact_store()
+        conn = datastore.connect(self.db_path)
+        conn.executemany('''
+            INSERT OR REPLACE INTO outreach_artifacts (prospect_id, part, content_hash, prompt_version, content)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+        return len(rows)
+    
+    def get_outreach_bundle(self, prospect_data, regenerate=False, timeout=None):
+        artifacts = {} if regenerate else self.load_outreach_artifacts(prospect_data)
+        missing = [part for part in OUTREACH_PARTS if part not in artifacts]
+        
+        bundle = {**artifacts, 'cached': [part for part in OUTREACH_PARTS if part in artifacts], 'timed_out': []}
+        if missing:
+            generated = self.generate_outreach_bundle(prospect_data, {}, timeout=timeout, parts=missing, fresh=regenerate)
+            bundle.update(generated)
+            self.store_outreach_artifacts(
+                prospect_data,
+                {part: generated[part] for part in missing if part not in generated['timed_out']}
+            )
+        
+        return bundle
+    
+    def stream_outreach_bundle(self, prospect_data, regenerate=False):
+        artifacts = {} if regenerate else self.load_outreach_artifacts(prospect_data)
+        for part in OUTREACH_PARTS:
+            if part in artifacts:
+                yield {'part': part, 'type': 'done', 'result': artifacts[part], 'cached': True}
+        
+        missing = [part for part in OUTREACH_PARTS if part not in artifacts]
+        for event in self.stream_outreach_content(prospect_data, parts=missing):
+            if event['type'] == 'done':
+                self.store_outreach_artifacts(prospect_data, {event['part']: event['result']})
+            yield event
+    
+    def stream_outreach_part(self, part, prospect_data, events):
+        chunks = []
+        try:
+            stream = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": self.build_outreach_prompt(part, prospect_data)}],
+                stream=True,
+                call_site=f'stream_outreach_content.{part}',
+                **OUTREACH_GENERATION_SETTINGS[part]
+            )
+            for delta in stream.text_deltas():
+                chunks.append(delta)
+                events.put({'part': part, 'type': 'delta', 'text': delta})
             
-            VALUE PROP: "We use drones and AI to map plastic pollution on beaches, making cleanup efforts 300% more efficient. We're looking for partners who share our environmental mission."
+            result = self.parse_outreach_content(part, ''.join(chunks).strip(), prospect_data)
+        except Exception:
+            result = self.get_fallback_outreach_content(part, prospect_data)
+        
+        events.put({'part': part, 'type': 'done', 'result': result})
+    
+    def stream_outreach_content(self, prospect_data, parts=OUTREACH_PARTS, timeout=None):
+        timeout = self.generation_timeout if timeout is None else timeout
+        events = queue.Queue()
+        futures = {part: self.generation_executor.submit(self.stream_outreach_part, part, prospect_data, events) for part in parts}
+        
+        # The parts stream side by side, interleaved as their tokens arrive, under one shared deadline
+        deadline = time.monotonic() + timeout
+        pending = set(parts)
+        while pending:
+            try:
+                event = events.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if event['type'] == 'done':
+                pending.discard(event['part'])
+            yield event
+        
+        for part in parts:
+            if part in pending:
+                futures[part].cancel()
+                yield {'part': part, 'type': 'done', 'result': self.get_fallback_outreach_content(part, prospect_data), 'timed_out': True}
+    
+    def generate_step_content(self, step_type, prospect_data, template=None):
+        part = STEP_TYPE_PARTS.get(step_type)
+        # Each step is its own message: never served from the cache, and emails are told which step they are
+        if part == 'email':
+            result = self.generate_personalized_email(prospect_data, {'template': template}, fresh=True)
+        elif part == 'social_media':
+            result = self.generate_social_media_content(prospect_data, fresh=True)
+        elif part == 'call_script':
+            result = self.generate_call_script(prospect_data, fresh=True)
+        else:
+            return f"Execute {step_type} outreach"
+        return serialize_step_content(part, result)
+    
+    def ensure_campaign_tables(self):
+        if self.campaign_tables_ready:
+            return
+        with self.setup_lock:
+            if self.campaign_tables_ready:
+                return
+            conn = datastore.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outreach_campaigns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    prospect_id INTEGER,
+                    sequence_type TEXT,
+                    current_step INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'active',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (prospect_id) REFERENCES prospects (id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outreach_steps (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    campaign_id INTEGER,
+                    step_number INTEGER,
+                    step_type TEXT,
+                    scheduled_date DATE,
+                    content TEXT,
+                    status TEXT DEFAULT 'pending',
+                    executed_at TIMESTAMP,
+                    FOREIGN KEY (campaign_id) REFERENCES outreach_campaigns (id)
+                )
+            ''')
+            # Pending steps are a small, moving slice of the table: partial indexes keep due-date scans
+            # (task list, prefetcher, dispatcher) proportional to the pending work, not the history
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_outreach_steps_pending
+                ON outreach_steps (scheduled_date, id) WHERE status = 'pending'
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_outreach_steps_pending_type
+                ON outreach_steps (step_type, scheduled_date, id) WHERE status = 'pending'
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_outreach_steps_campaign ON outreach_steps (campaign_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_outreach_campaigns_prospect ON outreach_campaigns (prospect_id, status)')
+            conn.commit()
+            conn.close()
+            self.setup_campaign_stats()
+            self.campaign_tables_ready = True
+    
+    def setup_campaign_stats(self):
+        # Counters and their triggers are created with the backfill in one write transaction,
+        # so no step written meanwhile is counted twice or missed
+        with datastore.transaction(self.db_path, immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'outreach_campaign_stats'")
+            backfill = cursor.fetchone() is None
             
-            ENGAGEMENT: "Does environmental technology innovation align with your current initiatives?"
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outreach_campaign_stats (
+                    campaign_id INTEGER,
+                    step_type TEXT,
+                    status TEXT,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (campaign_id, step_type, status)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outreach_step_totals (
+                    step_type TEXT,
+                    status TEXT,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (step_type, status)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outreach_campaign_totals (
+                    status TEXT PRIMARY KEY,
+                    count INTEGER DEFAULT 0
+                ) WITHOUT ROWID
+            ''')
             
-            NEXT STEPS: "Could we schedule a brief 15-minute call to explore potential collaboration?"
-            """
+            step_delta = '''
+                INSERT INTO outreach_campaign_stats (campaign_id, step_type, status, count)
+                VALUES ({row}.campaign_id, {row}.step_type, {row}.status, {delta})
+                ON CONFLICT (campaign_id, step_type, status) DO UPDATE SET count = count + ({delta});
+                INSERT INTO outreach_step_totals (step_type, status, count)
+                VALUES ({row}.step_type, {row}.status, {delta})
+                ON CONFLICT (step_type, status) DO UPDATE SET count = count + ({delta});
+            '''
+            campaign_delta = '''
+                INSERT INTO outreach_campaign_totals (status, count) VALUES ({row}.status, {delta})
+                ON CONFLICT (status) DO UPDATE SET count = count + ({delta});
+            '''
+            triggers = {
+                'outreach_steps_stats_insert': ('AFTER INSERT ON outreach_steps', step_delta.format(row='NEW', delta=1)),
+                'outreach_steps_stats_update': (
+                    'AFTER UPDATE OF status, step_type, campaign_id ON outreach_steps '
+                    'WHEN OLD.status IS NOT NEW.status OR OLD.step_type IS NOT NEW.step_type '
+                    'OR OLD.campaign_id IS NOT NEW.campaign_id',
+                    step_delta.format(row='OLD', delta=-1) + step_delta.format(row='NEW', delta=1)
+                ),
+                'outreach_steps_stats_delete': ('AFTER DELETE ON outreach_steps', step_delta.format(row='OLD', delta=-1)),
+                'outreach_campaigns_stats_insert': ('AFTER INSERT ON outreach_campaigns', campaign_delta.format(row='NEW', delta=1)),
+                'outreach_campaigns_stats_update': (
+                    'AFTER UPDATE OF status ON outreach_campaigns WHEN OLD.status IS NOT NEW.status',
+                    campaign_delta.format(row='OLD', delta=-1) + campaign_delta.format(row='NEW', delta=1)
+                ),
+                'outreach_campaigns_stats_delete': ('AFTER DELETE ON outreach_campaigns', campaign_delta.format(row='OLD', delta=-1))
+            }
+            for name, (event, body) in triggers.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END')
+            
+            if backfill:
+                cursor.execute('''
+                    INSERT INTO outreach_campaign_stats (campaign_id, step_type, status, count)
+                    SELECT campaign_id, step_type, status, COUNT(*) FROM outreach_steps
+                    GROUP BY campaign_id, step_type, status
+                ''')
+                cursor.execute('''
+                    INSERT INTO outreach_step_totals (step_type, status, count)
+                    SELECT step_type, status, SUM(count) FROM outreach_campaign_stats
+                    GROUP BY step_type, status
+                ''')
+                cursor.execute('''
+                    INSERT INTO outreach_campaign_totals (status, count)
+                    SELECT status, COUNT(*) FROM outreach_campaigns GROUP BY status
+                ''')
     
-    def schedule_outreach_campaign(self, prospect_id, sequence_type="standard"):
-        conn = sqlite3.connect(self.db_path)
+    def schedule_outreach_campaign(self, prospect_id, sequence_type="standard", generate_content=False):
+        self.ensure_campaign_tables()
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM prospects WHERE id = ?', (prospect_id,))
@@ -225,31 +643,10 @@ Second Life NGO Partnership Team""",
         if not prospect_row:
             return False
         
-        prospect_data = {
-            'id': prospect_row[0],
-            'url': prospect_row[1],
-            'organization_name': prospect_row[2],
-            'emails': json.loads(prospect_row[3]),
-            'phones': json.loads(prospect_row[4]),
-            'content_text': prospect_row[6],
-            'sustainability_score': prospect_row[7],
-            'final_score': prospect_row[10]
-        }
+        prospect_data = prospect_from_row(prospect_row)
         
         sequence = self.create_outreach_sequence(prospect_data, sequence_type)
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS outreach_campaigns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                prospect_id INTEGER,
-                sequence_type TEXT,
-                current_step INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (prospect_id) REFERENCES prospects (id)
-            )
-        ''')
-        
         cursor.execute('''
             INSERT INTO outreach_campaigns (prospect_id, sequence_type)
             VALUES (?, ?)
@@ -257,36 +654,16 @@ Second Life NGO Partnership Team""",
         
         campaign_id = cursor.lastrowid
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS outreach_steps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                campaign_id INTEGER,
-                step_number INTEGER,
-                step_type TEXT,
-                scheduled_date DATE,
-                content TEXT,
-                status TEXT DEFAULT 'pending',
-                executed_at TIMESTAMP,
-                FOREIGN KEY (campaign_id) REFERENCES outreach_campaigns (id)
-            )
-        ''')
-        
         base_date = datetime.now()
         
         for i, step in enumerate(sequence):
             scheduled_date = base_date + timedelta(days=step['day'])
             
-            if step['type'] == 'email':
-                email_content = self.generate_personalized_email(prospect_data, {})
-                content = json.dumps(email_content)
-            elif step['type'] == 'linkedin':
-                social_content = self.generate_social_media_content(prospect_data)
-                content = json.dumps(social_content)
-            elif step['type'] == 'phone':
-                call_script = self.generate_call_script(prospect_data)
-                content = call_script
+            # LLM steps are stored empty and generated when due (ensure_step_content) or by a batch job
+            if generate_content or step['type'] not in STEP_TYPE_PARTS:
+                content = self.generate_step_content(step['type'], prospect_data, step['template'])
             else:
-                content = f"Execute {step['type']} outreach"
+                content = None
             
             cursor.execute('''
                 INSERT INTO outreach_steps 
@@ -299,36 +676,84 @@ Second Life NGO Partnership Team""",
         
         return campaign_id
     
-    def get_pending_outreach_tasks(self, days_ahead=1):
-        conn = sqlite3.connect(self.db_path)
+    def get_pending_outreach_tasks(self, days_ahead=1, limit=None, after=None, step_types=None):
+        self.ensure_campaign_tables()
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
         
         target_date = datetime.now().date() + timedelta(days=days_ahead)
         
-        cursor.execute('''
-            SELECT os.*, oc.prospect_id, p.organization_name, p.emails, p.phones
+        query = '''
+            SELECT os.id, os.campaign_id, os.step_number, os.step_type, os.scheduled_date, os.content, os.status,
+                   oc.prospect_id, p.organization_name
             FROM outreach_steps os
             JOIN outreach_campaigns oc ON os.campaign_id = oc.id
             JOIN prospects p ON oc.prospect_id = p.id
-            WHERE os.scheduled_date <= ? AND os.status = 'pending'
-            ORDER BY os.scheduled_date, os.step_number
-        ''', (target_date,))
-        
+            WHERE os.status = 'pending' AND os.scheduled_date <= ?
+        '''
+        params = [target_date]
+        if after:
+            # Keyset pagination: resume strictly after the last (scheduled_date, id) returned
+            query += ' AND (os.scheduled_date, os.id) > (?, ?)'
+            params += list(after)
+        if step_types:
+            query += f" AND os.step_type IN ({','.join('?' * len(step_types))})"
+            params += list(step_types)
+        query += ' ORDER BY os.scheduled_date, os.id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        
+        cursor.execute(query, params)
         tasks = cursor.fetchall()
         conn.close()
         
         return tasks
     
-    def execute_outreach_task(self, task_id):
-        conn = sqlite3.connect(self.db_path)
+    def ensure_step_content(self, step_id):
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
+        cursor.execute('''
+            SELECT os.step_type, os.content, oc.sequence_type, os.step_number, p.*
+            FROM outreach_steps os
+            JOIN outreach_campaigns oc ON os.campaign_id = oc.id
+            JOIN prospects p ON oc.prospect_id = p.id
+            WHERE os.id = ?
+        ''', (step_id,))
+        row = cursor.fetchone()
+        conn.close()
         
-        cursor.execute('SELECT * FROM outreach_steps WHERE id = ?', (task_id,))
-        task = cursor.fetchone()
+        if not row:
+            return None
+        if row[1] is not None:
+            return row[1]
+        
+        # The prefetcher and a due execution may ask for the same step at once: generate it once
+        return self.step_content_flight.do(
+            f"step-{step_id}",
+            lambda: self.store_step_content(step_id, self.generate_step_content(
+                row[0], prospect_from_row(row[4:]), self.step_template(row[2], row[3])
+            ))
+        )
+    
+    def store_step_content(self, step_id, content):
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('UPDATE outreach_steps SET content = ? WHERE id = ? AND content IS NULL', (content, step_id))
+        cursor.execute('SELECT content FROM outreach_steps WHERE id = ?', (step_id,))
+        stored = cursor.fetchone()
+        conn.commit()
+        conn.close()
         
-        if not task:
+        return stored[0] if stored else content
+    
+    def execute_outreach_task(self, task_id):
+        if self.ensure_step_content(task_id) is None:
             return False
         
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        
         cursor.execute('''
             UPDATE outreach_steps 
             SET status = 'executed', executed_at = CURRENT_TIMESTAMP
@@ -341,7 +766,8 @@ Second Life NGO Partnership Team""",
         return True
     
     def generate_campaign_report(self, campaign_id):
-        conn = sqlite3.connect(self.db_path)
+        self.ensure_campaign_tables()
+        conn = datastore.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -354,10 +780,10 @@ Second Life NGO Partnership Team""",
         campaign = cursor.fetchone()
         
         cursor.execute('''
-            SELECT step_type, status, COUNT(*) as count
-            FROM outreach_steps
-            WHERE campaign_id = ?
-            GROUP BY step_type, status
+            SELECT step_type, status, count
+            FROM outreach_campaign_stats
+            WHERE campaign_id = ? AND count > 0
+            ORDER BY step_type, status
         ''', (campaign_id,))
         
         step_stats = cursor.fetchall()
@@ -368,6 +794,34 @@ Second Life NGO Partnership Team""",
             'campaign_info': campaign,
             'step_statistics': step_stats
         }
+    
+    def get_campaign_summary(self):
+        self.ensure_campaign_tables()
+        conn = datastore.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT status, count FROM outreach_campaign_totals WHERE count > 0')
+        campaigns = dict(cursor.fetchall())
+        
+        cursor.execute('SELECT step_type, status, count FROM outreach_step_totals WHERE count > 0')
+        steps_by_type = {}
+        steps_by_status = {}
+        for step_type, status, count in cursor.fetchall():
+            steps_by_type.setdefault(step_type, {})[status] = count
+            steps_by_status[status] = steps_by_status.get(status, 0) + count
+        
+        conn.close()
+        
+        finished = steps_by_status.get('executed', 0) + steps_by_status.get('failed', 0)
+        return {
+            'campaigns': {'total': sum(campaigns.values()), 'by_status': campaigns},
+            'steps': {
+                'total': sum(steps_by_status.values()),
+                'by_status': steps_by_status,
+                'by_type': steps_by_type
+            },
+            'success_rate': round(steps_by_status.get('executed', 0) / finished, 4) if finished else None
+        }
 
 if __name__ == "__main__":
     api_key = "your_openai_api_key_here"
@@ -0,0 +1,173 @@
+import argparse
+
+from src import datastore
+
+# prospects column holding the JSON list -> contact kind and key in prospect dicts
+CONTACT_COLUMNS = {
+    'emails': 'email',
+    'phones': 'phone',
+    'addresses': 'address'
+}
+
+LOAD_BATCH_SIZE = 1000
+
+def contact_select(row, source='', where=''):
+    # Contacts of a prospect row, one per element of its JSON lists, with the email domain and its last label
+    lists = ' UNION ALL '.join(
+        f"SELECT {row}.id AS prospect_id, '{kind}' AS kind, trim(c.value) AS value "
+        f"FROM {source}json_each(CASE WHEN json_valid({row}.{column}) THEN {row}.{column} ELSE '[]' END) c{where}"
+        for column, kind in CONTACT_COLUMNS.items()
+    )
+    return f'''
+        SELECT prospect_id, kind, value, domain,
+               substr(domain, length(rtrim(domain, replace(domain, '.', ''))) + 1) AS tld
+        FROM (
+            SELECT prospect_id, kind, value,
+                   CASE WHEN kind = 'email' AND instr(value, '@') > 0
+                        THEN lower(substr(value, instr(value, '@') + 1)) END AS domain
+            FROM ({lists})
+            WHERE value <> ''
+        )
+    '''
+
+def ensure_contact_store(db_path):
+    with datastore.transaction(db_path, immediate=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prospect_contacts'")
+        created = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_contacts (
+                id INTEGER PRIMARY KEY,
+                prospect_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                domain TEXT,
+                tld TEXT,
+                UNIQUE (prospect_id, kind, value)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_prospect_contacts_value ON prospect_contacts (kind, value)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_prospect_contacts_domain ON prospect_contacts (kind, domain)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_prospect_contacts_tld ON prospect_contacts (kind, tld)')
+
+        insert_new = f'''
+            INSERT OR IGNORE INTO prospect_contacts (prospect_id, kind, value, domain, tld)
+            {contact_select('NEW')};
+        '''
+        # The crawler saves with INSERT OR REPLACE, whose implicit delete fires no trigger: a re-crawled url
+        # drops the contacts of the row it replaces before inserting the new ones
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS prospect_contacts_replace BEFORE INSERT ON prospects
+            BEGIN
+                DELETE FROM prospect_contacts WHERE prospect_id IN (SELECT id FROM prospects WHERE url = NEW.url);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS prospect_contacts_insert AFTER INSERT ON prospects
+            BEGIN {insert_new} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS prospect_contacts_update AFTER UPDATE OF emails, phones, addresses ON prospects
+            BEGIN
+                DELETE FROM prospect_contacts WHERE prospect_id = OLD.id;
+                {insert_new}
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS prospect_contacts_delete AFTER DELETE ON prospects
+            BEGIN
+                DELETE FROM prospect_contacts WHERE prospect_id = OLD.id;
+            END
+        ''')
+
+    # Rows written from now on are covered by the triggers: only the existing ones need loading
+    if created:
+        load_contacts_from_json(db_path)
+
+def load_contacts_from_json(db_path, batch_size=LOAD_BATCH_SIZE):
+    conn = datastore.connect(db_path)
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM prospects').fetchone()[0]
+    conn.close()
+
+    loaded = 0
+    # Id ranges keep each write transaction short; INSERT OR IGNORE makes a rerun after an interruption safe
+    for start in range(0, last_id, batch_size):
+        with datastore.transaction(db_path) as conn:
+            loaded += conn.execute(f'''
+                INSERT OR IGNORE INTO prospect_contacts (prospect_id, kind, value, domain, tld)
+                {contact_select('p', 'prospects p, ', ' WHERE p.id > :start AND p.id <= :end')}
+            ''', {'start': start, 'end': start + batch_size}).rowcount
+    return loaded
+
+def load_contacts(db_path, prospect_ids):
+    contacts = {prospect_id: {column: [] for column in CONTACT_COLUMNS} for prospect_id in prospect_ids}
+    if not contacts:
+        return contacts
+    keys = {kind: column for column, kind in CONTACT_COLUMNS.items()}
+
+    conn = datastore.connect(db_path)
+    cursor = conn.cursor()
+    ids = list(contacts)
+    # One query per page of prospects; chunks stay under SQLite's bound parameter limit
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        cursor.execute(f'''
+            SELECT prospect_id, kind, value FROM prospect_contacts
+            WHERE prospect_id IN ({','.join('?' * len(chunk))})
+            ORDER BY id
+        ''', chunk)
+        for prospect_id, kind, value in cursor.fetchall():
+            contacts[prospect_id][keys[kind]].append(value)
+    conn.close()
+
+    return contacts
+
+def email_domain_filter(email_domain):
+    # ".org" or ".co.uk" matches every email under that suffix, "greentech.org" that exact domain
+    email_domain = email_domain.strip().lower()
+    if not email_domain.startswith('.'):
+        return "SELECT prospect_id FROM prospect_contacts WHERE kind = 'email' AND domain = ?", [email_domain]
+    suffix = email_domain.lstrip('.')
+    tld = suffix.rsplit('.', 1)[-1]
+    if tld == suffix:
+        return "SELECT prospect_id FROM prospect_contacts WHERE kind = 'email' AND tld = ?", [tld]
+    # Multi-label suffix: the tld index narrows the rows, the LIKE checks the rest of the suffix
+    pattern = '%.' + suffix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return (
+        "SELECT prospect_id FROM prospect_contacts WHERE kind = 'email' AND tld = ? AND domain LIKE ? ESCAPE '\\'",
+        [tld, pattern]
+    )
+
+def find_shared_contacts(db_path, kind='email', limit=100):
+    conn = datastore.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT value, COUNT(DISTINCT prospect_id), GROUP_CONCAT(prospect_id)
+        FROM prospect_contacts
+        WHERE kind = ?
+        GROUP BY value
+        HAVING COUNT(DISTINCT prospect_id) > 1
+        ORDER BY COUNT(DISTINCT prospect_id) DESC, value
+        LIMIT ?
+    ''', (kind, limit))
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [
+        {
+            'value': value,
+            'prospect_count': count,
+            'prospect_ids': sorted({int(prospect_id) for prospect_id in prospect_ids.split(',')})
+        }
+        for value, count, prospect_ids in rows
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Charge les contacts JSON des prospects existants dans prospect_contacts')
+    parser.add_argument('--db', default='donor_prospects.db')
+    parser.add_argument('--batch-size', type=int, default=LOAD_BATCH_SIZE)
+    args = parser.parse_args()
+
+    ensure_contact_store(args.db)
+    print(f"Loaded {load_contacts_from_json(args.db, args.batch_size)} contacts")
@@ -1,54 +1,93 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from src.intelligent_donor_crawler import IntelligentDonorCrawler
-from src.ai_scoring_engine import AIProspectScoringEngine
-from src.personalized_outreach import PersonalizedOutreachEngine
-import sqlite3
+from src import datastore
+from src.services import DB_PATH, get_services
+from src.personalized_outreach import decode_task_cursor, encode_task_cursor, prospect_from_row
+from src.prospect_contacts import email_domain_filter, find_shared_contacts, load_contacts
+from src.ai_cache import get_completion_cache
+from src.ai_rate_limiter import get_rate_limiter
+from src.ai_router import RoutingAIClient
+from src.ai_singleflight import get_single_flight
+from src.ai_resilience import get_circuit_breaker
+from src.ai_transport import get_default_transport
+from src.ai_telemetry import get_telemetry_recorder
 import json
 from datetime import datetime
 
 donor_bp = Blueprint('donor', __name__)
 
-API_KEY = os.getenv('OPENAI_API_KEY', 'your_openai_api_key_here')
-DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'donor_prospects.db')
+AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai').lower()
+
+def request_flag(data, key, default=False):
+    # JSON booleans, or the same strings as the env flags: "false" must not switch generation on
+    value = data.get(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in ['1', 'true', 'yes']
+    return value is True or (isinstance(value, int) and value == 1)
 
 @donor_bp.route('/prospects', methods=['GET'])
 def get_prospects():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, url, organization_name, emails, phones, addresses, 
+        query = '''
+            SELECT id, url, organization_name, 
                    sustainability_score, donation_probability, engagement_score, final_score
             FROM prospects 
-            ORDER BY final_score DESC
-        ''')
+        '''
+        params = []
+        if request.args.get('email_domain'):
+            contact_query, contact_params = email_domain_filter(request.args['email_domain'])
+            query += f' WHERE id IN ({contact_query})'
+            params += contact_params
+        query += ' ORDER BY final_score DESC'
+        if request.args.get('limit'):
+            limit = request.args.get('limit', type=int)
+            if limit is None:
+                return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+            query += ' LIMIT ? OFFSET ?'
+            params += [max(1, min(limit, 1000)), max(0, request.args.get('offset', 0, type=int))]
+        
+        conn = datastore.connect(DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
         
+        contacts = load_contacts(DB_PATH, [row[0] for row in rows])
         prospects = []
-        for row in cursor.fetchall():
+        for row in rows:
             prospect = {
                 'id': row[0],
                 'url': row[1],
                 'organization_name': row[2],
-                'emails': json.loads(row[3]),
-                'phones': json.loads(row[4]),
-                'addresses': json.loads(row[5]),
-                'sustainability_score': row[6],
-                'donation_probability': row[7],
-                'engagement_score': row[8],
-                'final_score': row[9]
+                **contacts[row[0]],
+                'sustainability_score': row[3],
+                'donation_probability': row[4],
+                'engagement_score': row[5],
+                'final_score': row[6]
             }
             prospects.append(prospect)
         
-        conn.close()
         return jsonify({'success': True, 'prospects': prospects})
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@donor_bp.route('/prospects/shared-contacts', methods=['GET'])
+def get_shared_contacts():
+    try:
+        shared = find_shared_contacts(
+            DB_PATH,
+            kind=request.args.get('kind', 'email'),
+            limit=max(1, min(request.args.get('limit', 100, type=int), 1000))
+        )
+        return jsonify({'success': True, 'contacts': shared})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @donor_bp.route('/crawl', methods=['POST'])
 def start_crawl():
     try:
@@ -56,7 +95,7 @@ def start_crawl():
         campaign_description = data.get('campaign_description', '')
         max_organizations = data.get('max_organizations', 3)
         
-        crawler = IntelligentDonorCrawler(API_KEY, DB_PATH)
+        crawler = get_services().crawler
         results = crawler.run_intelligent_campaign(campaign_description, max_organizations)
         
         return jsonify({
@@ -71,7 +110,7 @@ def start_crawl():
 @donor_bp.route('/score', methods=['POST'])
 def score_prospects():
     try:
-        scoring_engine = AIProspectScoringEngine(API_KEY, DB_PATH)
+        scoring_engine = get_services().scoring
         scored_prospects = scoring_engine.batch_score_prospects()
         
         return jsonify({
@@ -82,40 +121,85 @@ def score_prospects():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def load_outreach_prospect(prospect_id):
+    conn = datastore.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM prospects WHERE id = ?', (prospect_id,))
+    prospect_row = cursor.fetchone()
+    conn.close()
+    
+    if not prospect_row:
+        return None
+    
+    return prospect_from_row(prospect_row)
+
 @donor_bp.route('/outreach/generate', methods=['POST'])
 def generate_outreach():
     try:
         data = request.get_json()
         prospect_id = data.get('prospect_id')
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM prospects WHERE id = ?', (prospect_id,))
-        prospect_row = cursor.fetchone()
-        conn.close()
+        prospect_data = load_outreach_prospect(prospect_id)
+        if not prospect_data:
+            return jsonify({'success': False, 'error': 'Prospect not found'}), 404
         
-        if not prospect_row:
+        outreach_engine = get_services().outreach
+        bundle = outreach_engine.get_outreach_bundle(
+            prospect_data,
+            regenerate=request_flag(data, 'regenerate'),
+            timeout=data.get('timeout')
+        )
+        
+        return jsonify({
+            'success': True,
+            'email': bundle['email'],
+            'social_media': bundle['social_media'],
+            'call_script': bundle['call_script'],
+            'cached': bundle['cached'],
+            'timed_out': bundle['timed_out']
+        })
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/generate/stream', methods=['POST'])
+def stream_outreach():
+    try:
+        data = request.get_json()
+        prospect_id = data.get('prospect_id')
+        
+        prospect_data = load_outreach_prospect(prospect_id)
+        if not prospect_data:
             return jsonify({'success': False, 'error': 'Prospect not found'}), 404
         
-        prospect_data = {
-            'organization_name': prospect_row[2],
-            'emails': json.loads(prospect_row[3]),
-            'phones': json.loads(prospect_row[4]),
-            'content_text': prospect_row[6],
-            'sustainability_score': prospect_row[7]
-        }
+        outreach_engine = get_services().outreach
+        regenerate = request_flag(data, 'regenerate')
         
-        outreach_engine = PersonalizedOutreachEngine(API_KEY, DB_PATH)
+        def generate_events():
+            for event in outreach_engine.stream_outreach_bundle(prospect_data, regenerate):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            yield "event: end\ndata: {}\n\n"
         
-        email_content = outreach_engine.generate_personalized_email(prospect_data, {})
-        social_content = outreach_engine.generate_social_media_content(prospect_data)
-        call_script = outreach_engine.generate_call_script(prospect_data)
+        return Response(
+            stream_with_context(generate_events()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/segments/emails', methods=['POST'])
+def generate_segment_emails():
+    try:
+        data = request.get_json(silent=True) or {}
+        result = get_services().outreach_segments.generate_segment_emails(data.get('prospect_ids'))
         
         return jsonify({
             'success': True,
-            'email': email_content,
-            'social_media': social_content,
-            'call_script': call_script
+            'segments': result['segments'],
+            'emails': result['emails'],
+            'stats': result['stats']
         })
     
     except Exception as e:
@@ -127,11 +211,13 @@ def create_campaign():
         data = request.get_json()
         prospect_id = data.get('prospect_id')
         sequence_type = data.get('sequence_type', 'standard')
+        generate_content = request_flag(data, 'generate_content')
         
-        outreach_engine = PersonalizedOutreachEngine(API_KEY, DB_PATH)
-        campaign_id = outreach_engine.schedule_outreach_campaign(prospect_id, sequence_type)
+        outreach_engine = get_services().outreach
+        campaign_id = outreach_engine.schedule_outreach_campaign(prospect_id, sequence_type, generate_content)
         
         if campaign_id:
+            get_services().outreach_dispatcher.wake()
             return jsonify({
                 'success': True,
                 'campaign_id': campaign_id,
@@ -143,12 +229,138 @@ def create_campaign():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@donor_bp.route('/outreach/campaigns/summary', methods=['GET'])
+def get_campaigns_summary():
+    try:
+        return jsonify({'success': True, 'summary': get_services().outreach.get_campaign_summary()})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/campaigns/<int:campaign_id>/report', methods=['GET'])
+def get_campaign_report(campaign_id):
+    try:
+        report = get_services().outreach.generate_campaign_report(campaign_id)
+        campaign = report['campaign_info']
+        if not campaign:
+            return jsonify({'success': False, 'error': 'Campaign not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'campaign': {
+                'id': campaign[0],
+                'prospect_id': campaign[1],
+                'sequence_type': campaign[2],
+                'current_step': campaign[3],
+                'status': campaign[4],
+                'created_at': campaign[5],
+                'organization_name': campaign[6],
+                'final_score': campaign[7]
+            },
+            'step_statistics': [
+                {'step_type': step_type, 'status': status, 'count': count}
+                for step_type, status, count in report['step_statistics']
+            ]
+        })
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/campaigns/bulk', methods=['POST'])
+def create_bulk_campaigns():
+    try:
+        data = request.get_json() or {}
+        
+        try:
+            job = get_services().outreach_campaigns.start_job(
+                sequence_type=data.get('sequence_type'),
+                prospect_ids=data.get('prospect_ids'),
+                top_n=data.get('top_n'),
+                recommendation=data.get('recommendation'),
+                min_score=data.get('min_score'),
+                skip_active=request_flag(data, 'skip_active', True)
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({'success': True, 'job': job}), 202
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/campaigns/bulk/<int:job_id>', methods=['GET'])
+def get_bulk_campaign_job(job_id):
+    try:
+        job = get_services().outreach_campaigns.get_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Campaign job not found'}), 404
+        
+        return jsonify({'success': True, 'job': job})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/batch', methods=['POST'])
+def create_batch_campaigns():
+    try:
+        data = request.get_json()
+        prospect_ids = data.get('prospect_ids') or []
+        sequence_type = data.get('sequence_type', 'standard')
+        
+        if not prospect_ids:
+            return jsonify({'success': False, 'error': 'prospect_ids is required'}), 400
+        
+        result = get_services().outreach_batch.create_campaigns(prospect_ids, sequence_type)
+        
+        return jsonify({
+            'success': True,
+            'campaign_ids': result['campaign_ids'],
+            'job': result['job']
+        }), 202
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/batch/<int:job_id>', methods=['GET'])
+def get_batch_job(job_id):
+    try:
+        job = get_services().outreach_batch.poll_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Batch job not found'}), 404
+        
+        return jsonify({'success': True, 'job': job})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/dispatcher', methods=['GET'])
+def get_dispatcher_status():
+    try:
+        return jsonify({'success': True, 'dispatcher': get_services().outreach_dispatcher.status()})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @donor_bp.route('/outreach/tasks', methods=['GET'])
 def get_outreach_tasks():
     try:
-        outreach_engine = PersonalizedOutreachEngine(API_KEY, DB_PATH)
-        tasks = outreach_engine.get_pending_outreach_tasks()
+        limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+        channels = [c for c in request.args.get('channel', '').split(',') if c]
+        
+        try:
+            after = decode_task_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        
+        outreach_engine = get_services().outreach
+        tasks = outreach_engine.get_pending_outreach_tasks(
+            days_ahead=request.args.get('days_ahead', 1, type=int),
+            limit=limit,
+            after=after,
+            step_types=channels
+        )
         
+        contacts = load_contacts(DB_PATH, {task[7] for task in tasks})
         formatted_tasks = []
         for task in tasks:
             formatted_task = {
@@ -159,25 +371,87 @@ def get_outreach_tasks():
                 'scheduled_date': task[4],
                 'content': task[5],
                 'status': task[6],
-                'prospect_id': task[8],
-                'organization_name': task[9],
-                'emails': json.loads(task[10]),
-                'phones': json.loads(task[11])
+                'prospect_id': task[7],
+                'organization_name': task[8],
+                'emails': contacts[task[7]]['emails'],
+                'phones': contacts[task[7]]['phones']
             }
             formatted_tasks.append(formatted_task)
         
         return jsonify({
             'success': True,
-            'tasks': formatted_tasks
+            'tasks': formatted_tasks,
+            'next_cursor': encode_task_cursor(tasks[-1]) if len(tasks) == limit else None
         })
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def claim_tasks_from(data):
+    channels = data.get('channel') or []
+    try:
+        limit = None if data.get('limit') is None else int(data['limit'])
+        lease_seconds = None if data.get('lease_seconds') is None else float(data['lease_seconds'])
+        task_ids = [int(task_id) for task_id in data['task_ids']] if data.get('task_ids') else None
+        step_types = channels.split(',') if isinstance(channels, str) else list(channels)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid claim: {e}'}), 400
+    
+    lease = get_services().outreach_tasks.claim(
+        limit=limit,
+        task_ids=task_ids,
+        step_types=step_types,
+        lease_seconds=lease_seconds
+    )
+    return jsonify({'success': True, **lease})
+
+@donor_bp.route('/outreach/tasks/claim', methods=['POST'])
+def claim_outreach_tasks():
+    try:
+        return claim_tasks_from(request.get_json() or {})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def complete_tasks_from(data):
+    if not data.get('lease_id'):
+        return jsonify({'success': False, 'error': 'lease_id is required'}), 400
+    results = data.get('results') or []
+    if not isinstance(results, list):
+        return jsonify({'success': False, 'error': 'results must be a list'}), 400
+    
+    try:
+        result = get_services().outreach_tasks.complete(data['lease_id'], results)
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid results: {e}'}), 400
+    
+    return jsonify({'success': True, **result})
+
+@donor_bp.route('/outreach/tasks/complete', methods=['POST'])
+def complete_outreach_tasks():
+    try:
+        return complete_tasks_from(request.get_json() or {})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/outreach/tasks/release', methods=['POST'])
+def release_outreach_tasks():
+    try:
+        data = request.get_json() or {}
+        if not data.get('lease_id'):
+            return jsonify({'success': False, 'error': 'lease_id is required'}), 400
+        
+        released = get_services().outreach_tasks.release(data['lease_id'], data.get('task_ids'))
+        return jsonify({'success': True, 'released': released})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @donor_bp.route('/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = datastore.connect(DB_PATH)
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM prospects')
@@ -189,27 +463,65 @@ def get_dashboard_stats():
         cursor.execute('SELECT AVG(final_score) FROM prospects')
         avg_score = cursor.fetchone()[0] or 0
         
-        cursor.execute('''
-            SELECT COUNT(*) FROM outreach_campaigns 
-            WHERE status = "active"
-        ''')
-        active_campaigns = cursor.fetchone()[0] if cursor.fetchone() else 0
-        
         conn.close()
         
+        outreach_summary = get_services().outreach.get_campaign_summary()
+        
         return jsonify({
             'success': True,
             'stats': {
                 'total_prospects': total_prospects,
                 'high_priority_prospects': high_priority,
                 'average_score': round(avg_score, 3),
-                'active_campaigns': active_campaigns
+                'active_campaigns': outreach_summary['campaigns']['by_status'].get('active', 0),
+                'outreach': outreach_summary
             }
         })
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@donor_bp.route('/ai/status', methods=['GET'])
+def get_ai_status():
+    try:
+        completion_cache = get_completion_cache()
+        status = {
+            'success': True,
+            'provider': AI_PROVIDER,
+            'rate_limit': get_rate_limiter(AI_PROVIDER).budget(),
+            'circuit_breaker': get_circuit_breaker(AI_PROVIDER).snapshot(),
+            'transport': get_default_transport().stats(),
+            'cache': completion_cache.stats() if completion_cache else {'enabled': False},
+            'coalescing': get_single_flight().stats()
+        }
+        # With AI_ROUTING_PROVIDERS the calls go to the router's backends, each with its own breaker and budget
+        client = get_services().client
+        if isinstance(client, RoutingAIClient):
+            status['routing'] = client.stats()
+        return jsonify(status)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@donor_bp.route('/ai/telemetry', methods=['GET'])
+def get_ai_telemetry():
+    try:
+        recorder = get_telemetry_recorder()
+        if recorder is None:
+            return jsonify({'success': True, 'enabled': False, 'call_sites': []})
+        
+        hours = request.args.get('hours', type=float)
+        return jsonify({
+            'success': True,
+            'enabled': True,
+            'window_hours': hours,
+            'call_sites': recorder.summary(since_hours=hours),
+            'process_totals': recorder.process_totals()
+        })
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @donor_bp.route('/n8n/webhook', methods=['POST'])
 def n8n_webhook():
     try:
@@ -220,7 +532,7 @@ def n8n_webhook():
             campaign_description = data.get('campaign_description', '')
             max_organizations = data.get('max_organizations', 3)
             
-            crawler = IntelligentDonorCrawler(API_KEY, DB_PATH)
+            crawler = get_services().crawler
             results = crawler.run_intelligent_campaign(campaign_description, max_organizations)
             
             return jsonify({
@@ -230,7 +542,7 @@ def n8n_webhook():
             })
         
         elif action == 'score_prospects':
-            scoring_engine = AIProspectScoringEngine(API_KEY, DB_PATH)
+            scoring_engine = get_services().scoring
             scored_prospects = scoring_engine.batch_score_prospects()
             
             return jsonify({
@@ -240,15 +552,26 @@ def n8n_webhook():
             })
         
         elif action == 'execute_outreach':
-            task_id = data.get('task_id')
-            outreach_engine = PersonalizedOutreachEngine(API_KEY, DB_PATH)
-            success = outreach_engine.execute_outreach_task(task_id)
+            task_queue = get_services().outreach_tasks
+            
+            if data.get('task_ids'):
+                result = task_queue.execute(data['task_ids'])
+                return jsonify({'success': True, **result})
+            
+            result = task_queue.execute([data.get('task_id')])
+            success = result['completed'] > 0
             
             return jsonify({
                 'success': success,
                 'message': 'Task executed' if success else 'Task not found'
             })
         
+        elif action == 'claim_outreach':
+            return claim_tasks_from(data)
+        
+        elif action == 'complete_outreach':
+            return complete_tasks_from(data)
+        
         else:
             return jsonify({'success': False, 'error': 'Unknown action'}), 400
     
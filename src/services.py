@@ -0,0 +1,102 @@
+import os
+import threading
+from typing import Optional
+
+from flask import current_app
+
+from src.ai_client import AIClient, provider_api_key
+from src.ai_router import RoutingAIClient
+from src.intelligent_donor_crawler import IntelligentDonorCrawler
+from src.ai_scoring_engine import AIProspectScoringEngine
+from src.email_delivery import EmailDeliveryChannel
+from src.personalized_outreach import PersonalizedOutreachEngine
+from src.outreach_batch import OutreachBatchGenerator
+from src.outreach_campaigns import BulkCampaignScheduler
+from src.outreach_dispatcher import OutreachDispatcher
+from src.outreach_tasks import OutreachTaskQueue
+from src.outreach_prefetch import OutreachContentPrefetcher
+from src.outreach_segments import OutreachSegmenter
+
+API_KEY = os.getenv('OPENAI_API_KEY', 'your_openai_api_key_here')
+DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'donor_prospects.db')
+
+EXTENSION_NAME = 'donor_services'
+
+_services_lock = threading.Lock()
+
+
+def create_ai_client(api_key=None):
+    """
+    Client AI partagé : routeur multi-fournisseurs si AI_ROUTING_PROVIDERS est défini, sinon AIClient
+    """
+    if os.getenv('AI_ROUTING_PROVIDERS'):
+        return RoutingAIClient.from_env()
+    return AIClient(api_key=provider_api_key(api_key))
+
+
+class DonorServices:
+    """
+    Moteurs créés une seule fois au démarrage et partagés par toutes les requêtes
+    (un client AI, un crawler, un moteur de scoring entraîné une fois, un moteur d'outreach
+    et la génération d'outreach par lots ou à l'échéance des étapes)
+    """
+
+    def __init__(self, api_key=None, db_path=None, client=None, scoring_model_path=None):
+        """
+        Args:
+            api_key: Clé API OpenAI (OPENAI_API_KEY), transmise au client AI seulement si AI_PROVIDER=openai
+            db_path: Base SQLite des prospects
+            client: Client AI à partager (par défaut: create_ai_client)
+            scoring_model_path: Modèle de scoring sauvegardé à charger au démarrage (AI_SCORING_MODEL_PATH)
+        """
+        self.api_key = api_key or API_KEY
+        self.db_path = db_path or DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self.client = client or create_ai_client(self.api_key)
+        self.crawler = IntelligentDonorCrawler(self.api_key, self.db_path, client=self.client)
+        self.scoring = AIProspectScoringEngine(self.api_key, self.db_path, client=self.client)
+        self.outreach = PersonalizedOutreachEngine(self.api_key, self.db_path, client=self.client)
+        self.outreach_batch = OutreachBatchGenerator(self.outreach)
+        self.outreach_prefetcher = OutreachContentPrefetcher(self.outreach)
+        self.outreach_tasks = OutreachTaskQueue(self.outreach)
+        self.outreach_dispatcher = OutreachDispatcher(self.outreach, self.outreach_tasks)
+        if os.getenv('EMAIL_DELIVERY_ENABLED', '0').lower() in ['1', 'true', 'yes']:
+            self.email_delivery = EmailDeliveryChannel(self.outreach)
+            self.outreach_dispatcher.register_handler('email', self.email_delivery)
+        else:
+            self.email_delivery = None
+        self.outreach_campaigns = BulkCampaignScheduler(self.outreach, on_created=self.outreach_dispatcher.wake)
+        self.outreach_segments = OutreachSegmenter(self.outreach, self.scoring)
+
+        scoring_model_path = scoring_model_path or os.getenv('AI_SCORING_MODEL_PATH')
+        if scoring_model_path and os.path.exists(scoring_model_path):
+            self.scoring.load_model(scoring_model_path)
+
+    def init_app(self, app):
+        app.extensions[EXTENSION_NAME] = self
+        return self
+
+    def start_background_tasks(self):
+        """
+        Démarre la pré-génération du contenu des étapes proches de leur échéance (OUTREACH_PREFETCH_ENABLED)
+        et l'exécution automatique des étapes échues (OUTREACH_DISPATCH_ENABLED), désactivées par défaut :
+        chaque worker gunicorn les démarrerait, et la pré-génération n'est pas partagée entre processus
+        """
+        if os.getenv('OUTREACH_PREFETCH_ENABLED', '0').lower() in ['1', 'true', 'yes']:
+            self.outreach_prefetcher.start()
+        if os.getenv('OUTREACH_DISPATCH_ENABLED', '0').lower() in ['1', 'true', 'yes']:
+            self.outreach_dispatcher.start()
+        return self
+
+
+def get_services(app=None) -> DonorServices:
+    """
+    Services de l'application courante (créés à la première utilisation si init_app n'a pas été appelé)
+    """
+    app = app or current_app._get_current_object()
+    services: Optional[DonorServices] = app.extensions.get(EXTENSION_NAME)
+    if services is None:
+        with _services_lock:
+            services = app.extensions.get(EXTENSION_NAME) or DonorServices().init_app(app)
+    return services